@@ -1,13 +1,17 @@
 import os
+import sys
+import hmac
 import secrets
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import Optional, List
 
+# Módulos compartilhados ficam na raiz do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 try:
-    import bcrypt
-    from passlib.context import CryptContext
-    from passlib.hash import bcrypt as passlib_bcrypt
     from fastapi import FastAPI, HTTPException, Depends, Request, Form, status
+    from fastapi.concurrency import run_in_threadpool
     from fastapi.responses import HTMLResponse, RedirectResponse
     from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
     from fastapi.staticfiles import StaticFiles
@@ -16,13 +20,16 @@ try:
     from starlette.middleware.sessions import SessionMiddleware
     from jose import JWTError, jwt
     from pydantic import BaseModel, EmailStr
-    from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, create_engine, Text
+    from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text
     from sqlalchemy.ext.declarative import declarative_base
     from sqlalchemy.orm import sessionmaker, Session, relationship
     from sqlalchemy.sql import func
-    import httpx
     import string
     import random
+    from cache import LRUTTLCache, RedirectEntry, redirect_ttl
+    from password_hashing import PasswordHasher, PasswordHasherBusy
+    from database_config import create_configured_engine, pool_stats
+    from pages import PageCache, RenderedPage, page_response
 except ImportError as e:
     print(f"⚠️ Erro ao importar dependências: {e}")
     from fastapi import FastAPI
@@ -40,6 +47,20 @@ except ImportError as e:
 SECRET_KEY = os.getenv('SECRET_KEY', 'fallback-secret-key-for-vercel')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Token do /api/metrics (Authorization: Bearer <token>); vazio desativa o endpoint
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Criação do schema no startup (desligar em produção para cold starts mais rápidos)
+DB_INIT_ON_STARTUP = os.getenv('DB_INIT_ON_STARTUP', 'true').lower() in ('1', 'true', 'yes')
+
+# Hash de senhas (bcrypt) em pool dedicado
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', '100'))
+
+# Cache de redirects
+REDIRECT_CACHE_SIZE = int(os.getenv('REDIRECT_CACHE_SIZE', '10000'))
+REDIRECT_CACHE_TTL = float(os.getenv('REDIRECT_CACHE_TTL', '300'))
 
 # Database setup com fallback para Vercel
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -53,22 +74,28 @@ if DATABASE_URL.startswith('postgres://'):
 
 # Configurar engine com tratamento de erro
 try:
-    if DATABASE_URL.startswith('postgresql://'):
-        engine = create_engine(DATABASE_URL)
-        print("✅ PostgreSQL configurado")
-    else:
-        engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-        print("✅ SQLite configurado")
+    engine = create_configured_engine(DATABASE_URL)
 except Exception as e:
     print(f"⚠️ Erro na configuração do banco: {e}")
     DATABASE_URL = 'sqlite:///./linkify_fallback.db'
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    engine = create_configured_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+redirect_cache = LRUTTLCache(max_size=REDIRECT_CACHE_SIZE, ttl=REDIRECT_CACHE_TTL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cria as tabelas no startup, fora do import do módulo"""
+    if DB_INIT_ON_STARTUP:
+        init_database()
+    if page_cache:
+        page_cache.warm(("index.html", "dashboard.html", "login.html"))
+    yield
+
 # FastAPI app
-app = FastAPI(title="Linkify", description="Encurtador de URLs profissional")
+app = FastAPI(title="Linkify", description="Encurtador de URLs profissional", lifespan=lifespan)
 
 # Session middleware
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
@@ -101,152 +128,10 @@ except Exception as e:
     print(f"⚠️ Templates/Static não encontrados: {e}")
     templates = None
 
-# Models
-class User(Base):
-    __tablename__ = "users"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, unique=True, index=True)
-    email = Column(String, unique=True, index=True)
-    hashed_password = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    is_active = Column(Boolean, default=True)
-    oauth_provider = Column(String, nullable=True)
-    oauth_id = Column(String, nullable=True)
-    avatar_url = Column(String, nullable=True)
-    full_name = Column(String, nullable=True)
-    
-    links = relationship("Link", back_populates="owner")
-
-class Link(Base):
-    __tablename__ = "links"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    original_url = Column(String, index=True)
-    short_code = Column(String, unique=True, index=True)
-    clicks = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=True)
-    is_active = Column(Boolean, default=True)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    
-    owner = relationship("User", back_populates="links")
+# Páginas renderizadas uma vez e servidas com gzip/brotli + ETag
+page_cache = PageCache(lambda name: templates.get_template(name).render(), template_dir="api/frontend/templates") if templates else None
 
-# Criar tabelas
-try:
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created")
-except Exception as e:
-    print(f"⚠️ Database initialization error: {e}")
-
-# Pydantic models
-class UserCreate(BaseModel):
-    username: str
-    email: str
-    password: str
-
-class UserResponse(BaseModel):
-    id: int
-    username: str
-    email: str
-    created_at: datetime
-    
-    class Config:
-        from_attributes = True
-
-class LinkCreate(BaseModel):
-    original_url: str
-    custom_code: Optional[str] = None
-    expires_at: Optional[datetime] = None
-
-class LinkResponse(BaseModel):
-    id: int
-    original_url: str
-    short_code: str
-    clicks: int
-    created_at: datetime
-    expires_at: Optional[datetime]
-    is_active: bool
-    
-    class Config:
-        from_attributes = True
-
-class Token(BaseModel):
-    access_token: str
-    token_type: str
-
-class StatsResponse(BaseModel):
-    total_links: int
-    total_clicks: int
-    active_links: int
-
-# Utility functions
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-# Configuração de hash de senha
-try:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    
-    def hash_password(password: str) -> str:
-        return pwd_context.hash(password)
-    
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
-except:
-    # Fallback para bcrypt direto
-    def hash_password(password: str) -> str:
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
-
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
-
-def generate_short_code() -> str:
-    return secrets.token_urlsafe(6)
-
-# Routes
-@app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
-    if templates:
-        try:
-            return templates.TemplateResponse("index.html", {"request": request})
-        except:
-            pass
-    
-    return HTMLResponse(content="""
+INDEX_FALLBACK_PAGE = RenderedPage("""
     <!DOCTYPE html>
     <html>
     <head>
@@ -384,25 +269,162 @@ async def read_root(request: Request):
         </script>
     </body>
     </html>
-    """, status_code=200)
+    """)
+DASHBOARD_FALLBACK_PAGE = RenderedPage("<h1>Dashboard em desenvolvimento</h1><a href='/'>Voltar</a>")
+LOGIN_FALLBACK_PAGE = RenderedPage("<h1>Login em desenvolvimento</h1><a href='/'>Voltar</a>")
 
-@app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request):
-    if templates:
+def _template_page(name: str, fallback: RenderedPage) -> RenderedPage:
+    if page_cache:
         try:
-            return templates.TemplateResponse("dashboard.html", {"request": request})
-        except:
+            return page_cache.get(name)
+        except Exception:
             pass
-    return HTMLResponse("<h1>Dashboard em desenvolvimento</h1><a href='/'>Voltar</a>")
+    return fallback
+
+# Models
+class User(Base):
+    __tablename__ = "users"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String, unique=True, index=True)
+    email = Column(String, unique=True, index=True)
+    hashed_password = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    is_active = Column(Boolean, default=True)
+    oauth_provider = Column(String, nullable=True)
+    oauth_id = Column(String, nullable=True)
+    avatar_url = Column(String, nullable=True)
+    full_name = Column(String, nullable=True)
+    
+    links = relationship("Link", back_populates="owner")
+
+class Link(Base):
+    __tablename__ = "links"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    original_url = Column(String, index=True)
+    short_code = Column(String, unique=True, index=True)
+    clicks = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=True)
+    is_active = Column(Boolean, default=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    
+    owner = relationship("User", back_populates="links")
+
+def init_database():
+    """Cria as tabelas (executado pelo lifespan)"""
+    try:
+        Base.metadata.create_all(bind=engine)
+    except Exception as e:
+        print(f"⚠️ Database initialization error: {e}")
+
+# Pydantic models
+class UserCreate(BaseModel):
+    username: str
+    email: str
+    password: str
+
+class UserResponse(BaseModel):
+    id: int
+    username: str
+    email: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class LinkCreate(BaseModel):
+    original_url: str
+    custom_code: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
+class LinkResponse(BaseModel):
+    id: int
+    original_url: str
+    short_code: str
+    clicks: int
+    created_at: datetime
+    expires_at: Optional[datetime]
+    is_active: bool
+    
+    class Config:
+        from_attributes = True
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str
+
+class StatsResponse(BaseModel):
+    total_links: int
+    total_clicks: int
+    active_links: int
+
+# Utility functions
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Configuração de hash de senha (pool dedicado, fora do threadpool das rotas)
+password_hasher = PasswordHasher(
+    rounds=BCRYPT_ROUNDS,
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE
+)
+
+async def run_password_hasher(method, *args):
+    try:
+        return await method(*args)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Muitas requisições de autenticação, tente novamente", headers={"Retry-After": "1"})
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    to_encode = data.copy()
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=15)
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        username: str = payload.get("sub")
+        if username is None:
+            raise credentials_exception
+    except JWTError:
+        raise credentials_exception
+    
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        raise credentials_exception
+    return user
+
+def generate_short_code() -> str:
+    return secrets.token_urlsafe(6)
+
+# Routes
+@app.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    return page_response(request, _template_page("index.html", INDEX_FALLBACK_PAGE))
+
+@app.get("/dashboard", response_class=HTMLResponse)
+async def dashboard(request: Request):
+    return page_response(request, _template_page("dashboard.html", DASHBOARD_FALLBACK_PAGE))
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
-    if templates:
-        try:
-            return templates.TemplateResponse("login.html", {"request": request})
-        except:
-            pass
-    return HTMLResponse("<h1>Login em desenvolvimento</h1><a href='/'>Voltar</a>")
+    return page_response(request, _template_page("login.html", LOGIN_FALLBACK_PAGE))
 
 @app.get("/health")
 def health_check():
@@ -414,37 +436,78 @@ def health_check():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+metrics_security = HTTPBearer(auto_error=False)
+
+def require_metrics_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_security)):
+    """Métricas expõem estado interno: só com o METRICS_TOKEN"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@app.get("/api/metrics", dependencies=[Depends(require_metrics_token)])
+def get_metrics():
+    """Métricas internas (pool, caches, hash de senhas)"""
+    return {
+        "db_pool": pool_stats(engine),
+        "redirect_cache": redirect_cache.stats(),
+        "password_hasher": password_hasher.stats()
+    }
+
 # API Routes
+def _find_user(db: Session, username: str, email: str):
+    return db.query(User).filter(
+        (User.email == email) | (User.username == username)
+    ).first()
+
+def _get_user(db: Session, username: str):
+    return db.query(User).filter(User.username == username).first()
+
+def _save_user(db: Session, db_user: User):
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+def _update_password_hash(db: Session, user: User, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.commit()
+
 @app.post("/api/auth/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
     # Verificar se usuário já existe
-    db_user = db.query(User).filter(
-        (User.email == user.email) | (User.username == user.username)
-    ).first()
+    db_user = await run_in_threadpool(_find_user, db, user.username, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email ou username já cadastrado")
     
     # Criar novo usuário
-    hashed_password = hash_password(user.password)
+    hashed_password = await run_password_hasher(password_hasher.hash, user.password)
     db_user = User(
         username=user.username,
         email=user.email,
         hashed_password=hashed_password
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await run_in_threadpool(_save_user, db, db_user)
 
 @app.post("/api/auth/login", response_model=Token)
-def login(username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+async def login(username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_get_user, db, username)
+    if not user or not user.hashed_password or not await run_password_hasher(password_hasher.verify, password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Username ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    # Regravar hashes com custo desatualizado
+    if password_hasher.needs_rehash(user.hashed_password):
+        new_hash = await run_password_hasher(password_hasher.hash, password)
+        await run_in_threadpool(_update_password_hash, db, user, new_hash)
+        password_hasher.rehashed += 1
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -524,8 +587,10 @@ def delete_link(link_id: int, current_user: User = Depends(get_current_user), db
     link = db.query(Link).filter(Link.id == link_id, Link.owner_id == current_user.id).first()
     if not link:
         raise HTTPException(status_code=404, detail="Link não encontrado")
+    short_code = link.short_code
     db.delete(link)
     db.commit()
+    redirect_cache.delete(short_code)
     return {"message": "Link deletado com sucesso"}
 
 @app.get("/api/stats", response_model=StatsResponse)
@@ -543,19 +608,26 @@ def get_stats(current_user: User = Depends(get_current_user), db: Session = Depe
 
 @app.get("/{short_code}")
 def redirect_link(short_code: str, db: Session = Depends(get_db)):
-    link = db.query(Link).filter(Link.short_code == short_code, Link.is_active == True).first()
-    if not link:
+    entry = redirect_cache.get(short_code)
+    if entry is None:
+        link = db.query(Link).filter(Link.short_code == short_code, Link.is_active == True).first()
+        if not link:
+            raise HTTPException(status_code=404, detail="Link não encontrado")
+        entry = RedirectEntry(link.id, link.original_url, link.expires_at, link.is_active)
+        redirect_cache.set(short_code, entry, ttl=redirect_ttl(entry.expires_at, REDIRECT_CACHE_TTL))
+    
+    if not entry.is_active:
         raise HTTPException(status_code=404, detail="Link não encontrado")
     
     # Verificar se expirou
-    if link.expires_at and datetime.utcnow() > link.expires_at:
+    if entry.expires_at and datetime.utcnow() > entry.expires_at:
         raise HTTPException(status_code=410, detail="Link expirado")
     
     # Incrementar contador de cliques
-    link.clicks += 1
+    db.query(Link).filter(Link.id == entry.link_id).update({Link.clicks: Link.clicks + 1})
     db.commit()
     
-    return RedirectResponse(url=link.original_url, status_code=302)
+    return RedirectResponse(url=entry.original_url, status_code=302)
 
 # Handler direto para Vercel
 handler = app
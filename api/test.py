@@ -1,30 +1,16 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import os
+import sys
 import urllib.parse
 
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
-        self.end_headers()
-        
-        if self.path == '/health':
-            response = {
-                'status': 'ok',
-                'message': 'Linkify API funcionando!',
-                'service': 'linkify-vercel'
-            }
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-        elif self.path == '/api':
-            response = {
-                'message': 'API Linkify',
-                'endpoints': ['/health', '/', '/api'],
-                'status': 'online'
-            }
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
-        else:
-            # Interface completa do Linkify
-            html_content = """
+# Módulos compartilhados ficam na raiz do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pages import RenderedPage, etag_matches
+
+# Interface completa do Linkify, comprimida uma única vez no import
+HTML_PAGE = RenderedPage("""
             <!DOCTYPE html>
             <html lang="pt-BR">
             <head>
@@ -297,7 +283,43 @@ class handler(BaseHTTPRequestHandler):
                             1. ✅ <strong>Deploy Base:</strong> Concluído<br>
                             2. ⏳ <strong>Database:</strong> Configurar PostgreSQL no Vercel<br>
                             3. ⏳ <strong>OAuth:</strong> Adicionar credenciais Google/GitHub<br>
-            """
-            self.wfile.write(html_content.encode('utf-8'))
+            """)
+
+class handler(BaseHTTPRequestHandler):
+    def _send_ok_headers(self):
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_ok_headers()
+            response = {
+                'status': 'ok',
+                'message': 'Linkify API funcionando!',
+                'service': 'linkify-vercel'
+            }
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        elif self.path == '/api':
+            self._send_ok_headers()
+            response = {
+                'message': 'API Linkify',
+                'endpoints': ['/health', '/', '/api'],
+                'status': 'online'
+            }
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        else:
+            # Interface pré-renderizada: variante comprimida + ETag/304
+            encoding, body, etag = HTML_PAGE.select(self.headers.get('Accept-Encoding'))
+            not_modified = etag_matches(self.headers.get('If-None-Match'), etag)
+            self.send_response(304 if not_modified else 200)
+            for name, value in HTML_PAGE.headers(encoding, etag).items():
+                self.send_header(name, value)
+            if not not_modified:
+                self.send_header('Content-type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if not not_modified:
+                self.wfile.write(body)
         
         return
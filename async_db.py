@@ -0,0 +1,39 @@
+"""
+Modo assíncrono do banco de dados (SQLAlchemy AsyncEngine)
+asyncpg para PostgreSQL e aiosqlite para SQLite
+"""
+from typing import Any, Callable
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+ASYNC_DRIVERS = {
+    'postgresql://': 'postgresql+asyncpg://',
+    'sqlite://': 'sqlite+aiosqlite://',
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Converte a DATABASE_URL sync para o driver async equivalente"""
+    for prefix, async_prefix in ASYNC_DRIVERS.items():
+        if database_url.startswith(prefix):
+            return database_url.replace(prefix, async_prefix, 1)
+    return database_url
+
+
+def create_async_session_factory(database_url: str, **engine_kwargs) -> async_sessionmaker:
+    """Cria o AsyncEngine e a fábrica de AsyncSession"""
+    engine = create_async_engine(to_async_url(database_url), **engine_kwargs)
+    # expire_on_commit=False: objetos continuam legíveis fora do greenlet após o commit
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+async def run_db(db, func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Executa uma função de acesso ao banco escrita no estilo Session sync
+    - AsyncSession: via run_sync, sem bloquear o event loop
+    - Session: no threadpool, como os handlers sync faziam
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(func, *args)
+    return await run_in_threadpool(func, db, *args)
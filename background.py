@@ -0,0 +1,58 @@
+"""
+Tarefas periódicas em background (threads daemon)
+"""
+import threading
+import traceback
+from typing import Callable, Optional
+
+
+class PeriodicTask:
+    """Executa uma função em intervalo fixo numa thread daemon"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def trigger(self):
+        """Antecipa a próxima execução"""
+        self._wake.set()
+
+    def stop(self, run_final: bool = True, timeout: float = 10.0):
+        """Para a thread; por padrão executa a função uma última vez"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+        if run_final:
+            self._run_once()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            self._run_once()
+
+    def _run_once(self):
+        try:
+            self.func()
+        except Exception:
+            print(f"⚠️  Erro na tarefa {self.name}:")
+            traceback.print_exc()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark de throughput do redirect (GET /{short_code})
+Compara o modo sync (SessionLocal no threadpool) com o modo async (DB_ASYNC=true)
+
+Com --list-rows, mede linhas/s da listagem de links: ORM + response_model
+(caminho antigo) contra tuplas de colunas + FastJSONResponse (atual)
+
+Uso: python benchmark.py [--requests 2000] [--concurrency 50] [--links 500] [--cache]
+     python benchmark.py --list-rows 5000 [--repeats 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    'sync': {'DB_ASYNC': 'false'},
+    'async': {'DB_ASYNC': 'true'},
+}
+
+
+def seed_links(main, count: int):
+    """Cria os links usados no benchmark"""
+    main.init_database()
+    db = main.SessionLocal()
+    try:
+        db.add_all([
+            main.Link(original_url=f"https://example.com/{i}", short_code=f"bench{i}")
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_redirects(app, total: int, concurrency: int, links: int) -> float:
+    """Dispara os redirects via ASGI e retorna o tempo total em segundos"""
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def hit(i: int):
+            async with semaphore:
+                response = await client.get(f"/bench{i % links}", follow_redirects=False)
+                if response.status_code != 302:
+                    raise RuntimeError(f"Resposta inesperada: {response.status_code}")
+
+        async with app.router.lifespan_context(app):
+            started = time.perf_counter()
+            await asyncio.gather(*(hit(i) for i in range(total)))
+            return time.perf_counter() - started
+
+
+def worker(args):
+    """Executa um modo isolado (o modo é lido na importação do main)"""
+    import main
+
+    seed_links(main, args.links)
+    elapsed = asyncio.run(run_redirects(main.app, args.requests, args.concurrency, args.links))
+    print(json.dumps({"elapsed": elapsed, "rps": args.requests / elapsed}))
+
+
+def list_worker(args):
+    """Serializa a mesma listagem pelos dois caminhos e confere que os bytes são iguais"""
+    import main
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fast_json import FastJSONResponse
+
+    main.init_database()
+    db = main.SessionLocal()
+    try:
+        owner = main.User(username="bench", email="bench@example.com")
+        db.add(owner)
+        db.flush()
+        db.add_all([
+            main.Link(original_url=f"https://example.com/{i}", short_code=f"list{i}", owner_id=owner.id)
+            for i in range(args.list_rows)
+        ])
+        db.commit()
+        owner_id = owner.id
+    finally:
+        db.close()
+
+    order = (main.Link.created_at.desc(), main.Link.id.desc())
+    columns = [getattr(main.Link, name) for name in main.LINK_FIELDS]
+
+    def orm_pydantic() -> bytes:
+        db = main.SessionLocal()
+        try:
+            links = db.query(main.Link).filter(main.Link.owner_id == owner_id).order_by(*order).all()
+            validated = [main.LinkResponse.model_validate(link) for link in links]
+            return JSONResponse(jsonable_encoder(validated)).body
+        finally:
+            db.close()
+
+    def tuples_fast_json() -> bytes:
+        db = main.SessionLocal()
+        try:
+            rows = db.query(*columns).filter(main.Link.owner_id == owner_id).order_by(*order).all()
+            return FastJSONResponse([dict(zip(main.LINK_FIELDS, row)) for row in rows]).body
+        finally:
+            db.close()
+
+    if orm_pydantic() != tuples_fast_json():
+        raise RuntimeError("Saídas diferentes entre os dois caminhos")
+
+    results = {}
+    for name, func in (("orm_pydantic", orm_pydantic), ("tuples_fast_json", tuples_fast_json)):
+        started = time.perf_counter()
+        for _ in range(args.repeats):
+            func()
+        elapsed = time.perf_counter() - started
+        results[name] = args.list_rows * args.repeats / elapsed
+    print(json.dumps(results))
+
+
+def run_mode(mode: str, args) -> dict:
+    tmpdir = tempfile.mkdtemp(prefix="linkify-bench-")
+    env = dict(os.environ, **MODES[mode])
+    env['DATABASE_URL'] = f"sqlite:///{tmpdir}/bench.db"
+    if not args.cache:
+        # Sem cache de redirect: toda requisição consulta o banco
+        env['REDIRECT_CACHE_SIZE'] = '0'
+    command = [
+        sys.executable, __file__, '--worker',
+        '--requests', str(args.requests),
+        '--concurrency', str(args.concurrency),
+        '--links', str(args.links),
+    ]
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Modo {mode} falhou:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_list_benchmark(args):
+    print("⏱️  Benchmark da listagem de links - Linkify")
+    print("=" * 50)
+    print(f"Links: {args.list_rows} | Repetições: {args.repeats}\n")
+    tmpdir = tempfile.mkdtemp(prefix="linkify-bench-")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmpdir}/bench.db")
+    command = [
+        sys.executable, __file__, '--worker',
+        '--list-rows', str(args.list_rows),
+        '--repeats', str(args.repeats),
+    ]
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"❌ {result.stderr}")
+        return
+    rates = json.loads(result.stdout.strip().splitlines()[-1])
+    for name, rate in rates.items():
+        print(f"✅ {name:18} {rate:12.0f} linhas/s")
+    print(f"\n⚡ Ganho: {rates['tuples_fast_json'] / rates['orm_pydantic']:.1f}x (saída idêntica byte a byte)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de redirects do Linkify")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--links', type=int, default=500)
+    parser.add_argument('--cache', action='store_true', help="Mantém o cache de redirect ativo")
+    parser.add_argument('--list-rows', type=int, default=0, help="Benchmark da listagem com N links")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        list_worker(args) if args.list_rows else worker(args)
+        return
+
+    if args.list_rows:
+        run_list_benchmark(args)
+        return
+
+    print("⏱️  Benchmark de redirects - Linkify")
+    print("=" * 50)
+    print(f"Requisições: {args.requests} | Concorrência: {args.concurrency} | Links: {args.links}")
+    print(f"Cache de redirect: {'ativo' if args.cache else 'desativado'}\n")
+
+    for mode in MODES:
+        try:
+            result = run_mode(mode, args)
+        except RuntimeError as e:
+            print(f"❌ {mode:6} {e}")
+            continue
+        print(f"✅ {mode:6} {result['rps']:10.1f} req/s  ({result['elapsed']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Filtro de Bloom dos códigos curtos existentes
+
+Permite responder 404 para códigos que certamente não existem (bots varrendo
+caminhos aleatórios) sem consultar o banco. Pode haver falsos positivos,
+que seguem para a consulta normal, mas nunca falsos negativos para códigos
+já carregados ou adicionados neste processo.
+
+Com vários workers o filtro local não é autoritativo: um código criado em
+outro processo só chega pelo barramento de invalidação ou pelo refresh.
+Nesse modo (authoritative=False) a ausência no filtro não vira 404 - a
+consulta vai ao banco e o código encontrado entra no filtro (learn). Se o
+barramento perdeu mensagens, o filtro fica "stale" até o próximo refresh.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+class BloomFilter:
+    """Bloom filter simples sobre bytearray com double hashing (blake2b)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        with self._lock:
+            changed = False
+            for position in self._positions(key):
+                mask = 1 << (position & 7)
+                if not self._bits[position >> 3] & mask:
+                    self._bits[position >> 3] |= mask
+                    changed = True
+            # Chaves repetidas não contam (refresh reprocessa uma janela de ids)
+            if changed:
+                self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_fp_rate(self) -> float:
+        """(1 - e^(-kn/m))^k para o número de inserções atual"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class ShortCodeFilter:
+    """Mantém o BloomFilter dos short_codes: carga inicial, atualização incremental e reconstrução"""
+
+    # Ids abaixo do maior já visto podem ser confirmados fora de ordem por outras transações
+    REFRESH_OVERLAP = 1000
+
+    def __init__(self, session_factory, link_model, error_rate: float = 0.01, min_capacity: int = 100000,
+                 rebuild_interval: float = 3600.0, enabled: bool = True, authoritative: bool = True):
+        self.session_factory = session_factory
+        self.link_model = link_model
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.rebuild_interval = rebuild_interval
+        self.enabled = enabled
+        # Só este processo cria links: ausência no filtro é definitiva
+        self.authoritative = authoritative
+        self._filter: Optional[BloomFilter] = None
+        self._max_id = 0
+        self._rebuild_lock = threading.Lock()
+        self._pending = None  # códigos adicionados durante uma reconstrução
+        self._built_at = 0.0
+        # mark_stale() incrementa; refresh/rebuild alcançam o valor visto no início
+        self._stale_marks = 0
+        self._synced_marks = 0
+        self.rebuilds = 0
+        self.definite_misses = 0
+        self.unverified_misses = 0
+        self.learned = 0
+        self.false_positives = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    @property
+    def stale(self) -> bool:
+        return self._stale_marks != self._synced_marks
+
+    def lookup(self, short_code: str) -> Optional[bool]:
+        """
+        True: talvez exista; False: certamente não existe
+        None: o filtro não decide (desativado, não carregado, stale ou ausência não autoritativa)
+        """
+        bloom = self._filter
+        if not self.enabled or bloom is None or self.stale:
+            return None
+        if short_code in bloom:
+            return True
+        if not self.authoritative:
+            # Pode ter sido criado em outro worker e ainda não ter chegado aqui
+            self.unverified_misses += 1
+            return None
+        self.definite_misses += 1
+        return False
+
+    def learn(self, short_code: str):
+        """Código encontrado no banco: entra no filtro se ainda não estava"""
+        bloom = self._filter
+        if not self.enabled or bloom is None or short_code in bloom:
+            return
+        self.add(short_code)
+        self.learned += 1
+
+    def record_false_positive(self):
+        """Filtro disse "talvez" e o código não existia"""
+        self.false_positives += 1
+
+    def mark_stale(self):
+        """Códigos de outros workers podem ter se perdido: consultar o banco até o próximo refresh"""
+        self._stale_marks += 1
+
+    def add(self, short_code: str):
+        if not self.enabled:
+            return
+        pending = self._pending
+        if pending is not None:
+            pending.append(short_code)
+        bloom = self._filter
+        if bloom is not None:
+            bloom.add(short_code)
+
+    def add_many(self, short_codes: Iterable[str]):
+        for short_code in short_codes:
+            self.add(short_code)
+
+    def rebuild(self) -> int:
+        """Reconstrói o filtro a partir do banco (remove códigos apagados)"""
+        link = self.link_model
+        with self._rebuild_lock:
+            marks = self._stale_marks
+            self._pending = []
+            db = self.session_factory()
+            try:
+                total = db.query(link.id).count()
+                bloom = BloomFilter(max(self.min_capacity, total * 2), self.error_rate)
+                max_id = 0
+                for link_id, short_code in db.query(link.id, link.short_code).yield_per(10000):
+                    bloom.add(short_code)
+                    max_id = max(max_id, link_id)
+            finally:
+                db.close()
+            for short_code in self._pending:
+                bloom.add(short_code)
+            self._filter = bloom
+            self._max_id = max_id
+            self._pending = None
+            self._built_at = time.monotonic()
+            self._synced_marks = marks
+            self.rebuilds += 1
+            return bloom.count
+
+    def refresh(self) -> int:
+        """Adiciona os links criados por outros processos; reconstrói quando vencido ou cheio"""
+        if not self.enabled:
+            return 0
+        bloom = self._filter
+        if (bloom is None or bloom.count >= bloom.capacity
+                or time.monotonic() - self._built_at >= self.rebuild_interval):
+            return self.rebuild()
+
+        link = self.link_model
+        marks = self._stale_marks
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(link.id, link.short_code)
+                .filter(link.id > self._max_id - self.REFRESH_OVERLAP)
+                .all()
+            )
+        finally:
+            db.close()
+        for link_id, short_code in rows:
+            bloom.add(short_code)
+            self._max_id = max(self._max_id, link_id)
+        self._synced_marks = marks
+        return len(rows)
+
+    def stats(self) -> Dict[str, object]:
+        bloom = self._filter
+        negatives = self.definite_misses + self.false_positives
+        stats: Dict[str, object] = {
+            "enabled": self.enabled,
+            "ready": bloom is not None,
+            "stale": self.stale,
+            "authoritative": self.authoritative,
+            "unverified_misses": self.unverified_misses,
+            "learned": self.learned,
+            "rebuilds": self.rebuilds,
+            "definite_misses": self.definite_misses,
+            "false_positives": self.false_positives,
+            "observed_fp_rate": round(self.false_positives / negatives, 6) if negatives else 0.0,
+        }
+        if bloom is not None:
+            stats.update({
+                "count": bloom.count,
+                "capacity": bloom.capacity,
+                "bits": bloom.num_bits,
+                "hashes": bloom.num_hashes,
+                "memory_bytes": bloom.memory_bytes,
+                "target_fp_rate": bloom.error_rate,
+                "estimated_fp_rate": round(bloom.estimated_fp_rate(), 6),
+            })
+        return stats
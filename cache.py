@@ -0,0 +1,288 @@
+"""
+Caches do Linkify: interface de backend, LRU em memória e cache em dois níveis
+"""
+import json
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class CacheBackend(ABC):
+    """
+    Interface dos caches (chave str -> valor)
+    Backends com I/O de rede marcam blocking=True; os métodos a* levam a
+    chamada para o threadpool para não travar o event loop.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: Any) -> Optional[Any]:
+        """Valor em cache ou None (miss ou expirado)"""
+
+    @abstractmethod
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        """Armazena o valor por até ttl segundos"""
+
+    @abstractmethod
+    def delete(self, key: Any) -> bool:
+        """Remove a entrada; True se existia"""
+
+    def get_many(self, keys: Iterable[Any]) -> List[Optional[Any]]:
+        """Valores na ordem das chaves; backends de rede sobrescrevem com uma única ida ao servidor"""
+        return [self.get(key) for key in keys]
+
+    def delete_many(self, keys: Iterable[Any]):
+        for key in keys:
+            self.delete(key)
+
+    def invalidate_local(self, keys: Iterable[Any]):
+        """Remove só a cópia deste processo (invalidação vinda de outro worker)"""
+
+    def clear_local(self):
+        """Descarta tudo o que este processo guarda localmente"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    async def _call(self, method, *args):
+        if self.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def aget(self, key: Any) -> Optional[Any]:
+        return await self._call(self.get, key)
+
+    async def aget_many(self, keys: List[Any]) -> List[Optional[Any]]:
+        return await self._call(self.get_many, keys)
+
+    async def aset(self, key: Any, value: Any, ttl: Optional[float] = None):
+        return await self._call(self.set, key, value, ttl)
+
+    async def adelete(self, key: Any) -> bool:
+        return await self._call(self.delete, key)
+
+
+class LRUTTLCache(CacheBackend):
+    """
+    Cache limitado com despejo por ordem LRU e por TTL
+    Seguro para uso entre threads (handlers sync rodam no threadpool)
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Retorna o valor em cache ou None (miss ou expirado)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, deadline = item
+            if deadline <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        """Armazena um valor; o TTL efetivo nunca passa do TTL padrão do cache"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self.delete(key)
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Any) -> bool:
+        """Remove a entrada, se existir"""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def invalidate_local(self, keys: Iterable[Any]):
+        self.delete_many(keys)
+
+    def clear_local(self):
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para dimensionar o cache"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TieredCache(CacheBackend):
+    """
+    LRU local (TTL curto) na frente de um backend compartilhado entre workers
+    Leituras tentam o local e depois o compartilhado; escritas e remoções vão aos dois.
+    """
+
+    def __init__(self, local: LRUTTLCache, shared: CacheBackend):
+        self.local = local
+        self.shared = shared
+        self.blocking = shared.blocking
+
+    def get(self, key: Any) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def get_many(self, keys: Iterable[Any]) -> List[Optional[Any]]:
+        keys = list(keys)
+        values = [self.local.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            # Uma ida ao backend compartilhado para todas as chaves que faltam
+            for i, value in zip(missing, self.shared.get_many([keys[i] for i in missing])):
+                if value is not None:
+                    values[i] = value
+                    self.local.set(keys[i], value)
+        return values
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        self.local.set(key, value, ttl)
+        self.shared.set(key, value, ttl)
+
+    def delete(self, key: Any) -> bool:
+        local = self.local.delete(key)
+        return self.shared.delete(key) or local
+
+    def delete_many(self, keys: Iterable[Any]):
+        keys = list(keys)
+        self.local.delete_many(keys)
+        self.shared.delete_many(keys)
+
+    async def aget(self, key: Any) -> Optional[Any]:
+        # Acerto local não passa pelo threadpool
+        value = self.local.get(key)
+        if value is None:
+            value = await self.shared.aget(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    async def aset(self, key: Any, value: Any, ttl: Optional[float] = None):
+        self.local.set(key, value, ttl)
+        await self.shared.aset(key, value, ttl)
+
+    async def adelete(self, key: Any) -> bool:
+        local = self.local.delete(key)
+        return await self.shared.adelete(key) or local
+
+    def clear(self):
+        self.local.clear()
+
+    def invalidate_local(self, keys: Iterable[Any]):
+        self.local.delete_many(keys)
+
+    def clear_local(self):
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"local": self.local.stats(), "shared": self.shared.stats()}
+
+
+class RedirectEntry(NamedTuple):
+    """Dados mínimos para responder um redirect sem consultar o banco"""
+    link_id: int
+    original_url: str
+    expires_at: Optional[datetime]
+    is_active: bool
+    redirect_status: int = 302
+    cache_max_age: Optional[int] = None  # None/0 = no-store (todo clique chega ao servidor)
+
+
+def redirect_ttl(expires_at: Optional[datetime], default_ttl: float) -> float:
+    """TTL da entrada de redirect, limitado ao expires_at do link"""
+    if expires_at is None:
+        return default_ttl
+    remaining = (expires_at - datetime.utcnow()).total_seconds()
+    return max(0.0, min(default_ttl, remaining))
+
+
+class UserSnapshot(NamedTuple):
+    """Cópia imutável e leve do usuário autenticado"""
+    id: int
+    username: str
+    email: str
+    created_at: Optional[datetime]
+    is_active: bool
+    oauth_provider: Optional[str]
+    avatar_url: Optional[str]
+    full_name: Optional[str]
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            created_at=user.created_at,
+            is_active=bool(user.is_active),
+            oauth_provider=user.oauth_provider,
+            avatar_url=user.avatar_url,
+            full_name=user.full_name,
+        )
+
+
+def tuple_codec(cls) -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    """(encode, decode) em JSON para os NamedTuples acima, com datetimes em ISO 8601"""
+    datetime_fields = {
+        i for i, annotation in enumerate(cls.__annotations__.values())
+        if annotation in (datetime, Optional[datetime])
+    }
+
+    def encode(value) -> bytes:
+        return json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in value]).encode("utf-8")
+
+    def decode(data: bytes):
+        values = json.loads(data)
+        for i in datetime_fields:
+            if i < len(values) and values[i] is not None:
+                values[i] = datetime.fromisoformat(values[i])
+        try:
+            return cls(*values)
+        except TypeError:
+            # Formato de outra versão (deploy em andamento): tratado como miss
+            return None
+
+    return encode, decode
@@ -0,0 +1,127 @@
+"""
+Agregação write-behind do contador de cliques
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, update
+
+from background import PeriodicTask
+
+
+class ClickBuffer:
+    """
+    Acumula incrementos de cliques por link em memória e grava tudo
+    com um único UPDATE em lote a cada flush
+    """
+
+    def __init__(self, session_factory, model, flush_interval: float = 2.0, max_size: int = 1000, on_flush=None):
+        self.session_factory = session_factory
+        self.model = model
+        # Callback (db, counts) executado na mesma transação do UPDATE
+        self.on_flush = on_flush
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._pending: Dict[int, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = PeriodicTask("click-buffer-flush", flush_interval, self.flush)
+        self.flushes = 0
+        self.flushed_clicks = 0
+        self.failed_flushes = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Intervalo 0 desativa o buffer (UPDATE direto a cada redirect)"""
+        return self.flush_interval > 0
+
+    def start(self):
+        if self.enabled:
+            self._task.start()
+
+    def stop(self):
+        """Para o flush periódico e grava o que estiver pendente"""
+        self._task.stop(run_final=True)
+
+    def add(self, link_id: int, count: int = 1):
+        """Registra cliques; grava imediatamente se o buffer estiver desativado"""
+        if not self.enabled:
+            self._apply({link_id: count})
+            return
+        with self._lock:
+            self._pending[link_id] += count
+            full = len(self._pending) >= self.max_size
+        if full:
+            self._task.trigger()
+
+    async def aadd(self, link_id: int, count: int = 1):
+        """add() para handlers async: com o buffer desativado o UPDATE roda no threadpool"""
+        if not self.enabled:
+            await run_in_threadpool(self._apply, {link_id: count})
+            return
+        # Buffer cheio só acorda a thread de flush
+        self.add(link_id, count)
+
+    def pending_for(self, link_ids: Iterable[int]) -> Dict[int, int]:
+        """Cliques ainda não gravados para os links informados"""
+        with self._lock:
+            return {link_id: self._pending[link_id] for link_id in link_ids if link_id in self._pending}
+
+    def pending_ids(self):
+        with self._lock:
+            return list(self._pending)
+
+    def flush(self) -> int:
+        """Grava os incrementos pendentes; retorna o total de cliques gravados"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = dict(self._pending)
+                self._pending.clear()
+            try:
+                self._apply(batch)
+            except Exception:
+                # Devolver os incrementos ao buffer para a próxima tentativa
+                with self._lock:
+                    for link_id, count in batch.items():
+                        self._pending[link_id] += count
+                self.failed_flushes += 1
+                raise
+            total = sum(batch.values())
+            self.flushes += 1
+            self.flushed_clicks += total
+            return total
+
+    def _apply(self, counts: Dict[int, int]):
+        model = self.model
+        stmt = (
+            update(model)
+            .where(model.id.in_(list(counts)))
+            .values(clicks=model.clicks + case(counts, value=model.id, else_=0))
+            .execution_options(synchronize_session=False)
+        )
+        db = self.session_factory()
+        try:
+            db.execute(stmt)
+            if self.on_flush is not None:
+                self.on_flush(db, counts)
+            db.commit()
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending_links = len(self._pending)
+            pending_clicks = sum(self._pending.values())
+        return {
+            "flush_interval": self.flush_interval,
+            "max_size": self.max_size,
+            "pending_links": pending_links,
+            "pending_clicks": pending_clicks,
+            "flushes": self.flushes,
+            "flushed_clicks": self.flushed_clicks,
+            "failed_flushes": self.failed_flushes,
+        }
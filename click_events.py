@@ -0,0 +1,210 @@
+"""
+Ingestão assíncrona de eventos de clique (tabela click_events)
+
+O redirect apenas coloca o evento numa fila em memória; uma thread em
+background drena a fila e grava os eventos com INSERTs multi-linha.
+"""
+import asyncio
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from background import PeriodicTask
+
+# Políticas quando a fila está cheia
+DROP_NEW = "drop_new"  # descarta o evento novo
+DROP_OLDEST = "drop_oldest"  # descarta o evento mais antigo da fila
+BLOCK = "block"  # espera até block_timeout e então descarta
+QUEUE_POLICIES = (DROP_NEW, DROP_OLDEST, BLOCK)
+
+
+def parse_user_agent(user_agent: Optional[str]) -> Tuple[str, str, str]:
+    """Classificação simples de (device_type, browser, os) a partir do User-Agent"""
+    ua = (user_agent or "").lower()
+    if not ua:
+        return "unknown", "unknown", "unknown"
+
+    if any(bot in ua for bot in ("bot", "crawler", "spider", "curl", "wget", "python-")):
+        device = "bot"
+    elif "ipad" in ua or "tablet" in ua:
+        device = "tablet"
+    elif "mobile" in ua or "iphone" in ua or "android" in ua:
+        device = "mobile"
+    else:
+        device = "desktop"
+
+    if "edg/" in ua:
+        browser = "Edge"
+    elif "opr/" in ua or "opera" in ua:
+        browser = "Opera"
+    elif "firefox/" in ua:
+        browser = "Firefox"
+    elif "chrome/" in ua or "crios/" in ua:
+        browser = "Chrome"
+    elif "safari/" in ua:
+        browser = "Safari"
+    else:
+        browser = "other"
+
+    if "windows" in ua:
+        os_name = "Windows"
+    elif "iphone" in ua or "ipad" in ua or "ios" in ua:
+        os_name = "iOS"
+    elif "android" in ua:
+        os_name = "Android"
+    elif "mac os" in ua or "macintosh" in ua:
+        os_name = "macOS"
+    elif "linux" in ua:
+        os_name = "Linux"
+    else:
+        os_name = "other"
+
+    return device, browser, os_name
+
+
+class ClickEventQueue:
+    """Fila limitada de eventos de clique com gravação em lote em background"""
+
+    def __init__(self, session_factory, model, link_model, max_size: int = 10000, policy: str = DROP_NEW,
+                 batch_size: int = 500, flush_interval: float = 1.0, block_timeout: float = 0.05):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Política de fila inválida: {policy}")
+        self.session_factory = session_factory
+        self.model = model
+        self.link_model = link_model
+        self.policy = policy
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_size)
+        self._task = PeriodicTask("click-event-writer", flush_interval, self.drain)
+        self._drain_lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed_batches = 0
+
+    def start(self):
+        self._task.start()
+
+    def stop(self):
+        """Para a thread e grava o que restou na fila"""
+        self._task.stop(run_final=True)
+
+    def publish(self, event: dict) -> bool:
+        """Enfileira um evento; na política block trava a thread chamadora até block_timeout"""
+        try:
+            if self.policy == BLOCK:
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            if self.policy != DROP_OLDEST:
+                self.dropped += 1
+                return False
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        self._accepted()
+        return True
+
+    async def apublish(self, event: dict) -> bool:
+        """Versão para handlers async: a política block espera com asyncio.sleep, sem travar o event loop"""
+        if self.policy != BLOCK:
+            return self.publish(event)
+        deadline = time.monotonic() + self.block_timeout
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                break
+            except queue.Full:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.dropped += 1
+                    return False
+                await asyncio.sleep(min(0.005, remaining))
+        self._accepted()
+        return True
+
+    def _accepted(self):
+        self.enqueued += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._task.trigger()
+
+    def drain(self) -> int:
+        """Grava todos os eventos enfileirados, em lotes de batch_size"""
+        total = 0
+        with self._drain_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return total
+                try:
+                    self._write(batch)
+                    total += len(batch)
+                except Exception as e:
+                    self.failed_batches += 1
+                    self.dropped += len(batch)
+                    print(f"⚠️  Erro ao gravar eventos de clique: {e}")
+
+    def _take_batch(self) -> List[dict]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[dict]):
+        rows = [self._to_row(event) for event in batch]
+        db = self.session_factory()
+        try:
+            try:
+                db.execute(insert(self.model), rows)
+            except IntegrityError:
+                # Link removido antes da gravação: descartar só esses eventos
+                db.rollback()
+                link_ids = {row["link_id"] for row in rows}
+                existing = {
+                    link_id for (link_id,) in
+                    db.query(self.link_model.id).filter(self.link_model.id.in_(link_ids))
+                }
+                kept = [row for row in rows if row["link_id"] in existing]
+                self.dropped += len(rows) - len(kept)
+                rows = kept
+                if rows:
+                    db.execute(insert(self.model), rows)
+            db.commit()
+            self.written += len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _to_row(event: dict) -> dict:
+        device_type, browser, os_name = parse_user_agent(event.get("user_agent"))
+        return dict(event, device_type=device_type, browser=browser, os=os_name)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "policy": self.policy,
+            "max_size": self._queue.maxsize,
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed_batches": self.failed_batches,
+        }
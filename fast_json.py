@@ -0,0 +1,38 @@
+"""
+Serialização JSON rápida para listas e estatísticas
+
+Usa orjson quando instalado; sem ele, cai no json da stdlib com a mesma saída
+do JSONResponse do FastAPI (sem espaços, UTF-8, datetimes em ISO 8601).
+"""
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Bytes idênticos aos do JSONResponse para dicts/listas de tipos simples e datetimes"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse sem jsonable_encoder: o conteúdo já deve ter só tipos simples"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,286 @@
+"""
+Invalidação de caches locais entre workers
+
+Cada worker apaga a entrada do próprio cache na hora e publica a chave no
+barramento; os demais workers recebem e apagam das suas cópias locais.
+Publicações próximas são agrupadas numa só mensagem (rajadas de deletes e
+lotes do reaper viram poucas mensagens).
+
+Transportes:
+- PostgreSQL: LISTEN/NOTIFY
+- Qualquer banco (SQLite, testes): tabela lida por polling
+"""
+import json
+import multiprocessing
+import os
+import select
+import sys
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import func, text
+
+from background import PeriodicTask
+
+# Limite do payload do NOTIFY é 8000 bytes
+MAX_PAYLOAD_BYTES = 7000
+
+
+def encode_messages(sender: str, pending: Dict[str, Set[str]]) -> Iterator[str]:
+    """Mensagens JSON {"s": remetente, "k": {tipo: [chaves]}} até MAX_PAYLOAD_BYTES cada"""
+    batch: Dict[str, List[str]] = {}
+    envelope = len(sender) + 16
+    size = envelope
+    for kind, keys in pending.items():
+        for key in keys:
+            key_size = len(json.dumps(key)) + 1
+            if batch and size + key_size > MAX_PAYLOAD_BYTES:
+                yield json.dumps({"s": sender, "k": batch}, separators=(",", ":"))
+                batch, size = {}, envelope
+            if kind not in batch:
+                size += len(kind) + 6
+            batch.setdefault(kind, []).append(key)
+            size += key_size
+    if batch:
+        yield json.dumps({"s": sender, "k": batch}, separators=(",", ":"))
+
+
+def multiple_workers() -> bool:
+    """
+    Indícios de que há outros workers servindo a mesma aplicação:
+    WEB_CONCURRENCY > 1, worker do gunicorn (fork do arbiter) ou processo
+    filho do uvicorn --workers/--reload (spawn do multiprocessing)
+    """
+    if int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+        return True
+    if 'gunicorn' in sys.modules:
+        return True
+    return multiprocessing.parent_process() is not None
+
+
+class InvalidationBus:
+    """Agrupa as invalidações publicadas e repassa as recebidas de outros workers"""
+
+    def __init__(self, transport, on_invalidate: Callable[[str, List[str]], None],
+                 coalesce_window: float = 0.05, on_gap: Optional[Callable[[], None]] = None):
+        self.transport = transport
+        self.on_invalidate = on_invalidate
+        self.on_gap = on_gap
+        self.coalesce_window = coalesce_window
+        self.sender = uuid.uuid4().hex[:12]
+        self._pending: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._task = PeriodicTask("cache-invalidation", 60.0, self._flush_after_window)
+        self.published_keys = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.keys_received = 0
+        self.send_errors = 0
+        self.gaps = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.transport is not None
+
+    def start(self):
+        if not self.enabled:
+            return
+        self.transport.start(self._receive, self._gap)
+        self._task.start()
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self._task.stop(run_final=False)
+        self.flush()
+        self.transport.stop()
+
+    def publish(self, kind: str, keys: List[str]):
+        """Agenda a invalidação das chaves nos outros workers"""
+        if not self.enabled or not keys:
+            return
+        with self._lock:
+            self._pending.setdefault(kind, set()).update(keys)
+            self.published_keys += len(keys)
+        self._task.trigger()
+
+    def _flush_after_window(self):
+        # Espera a rajada terminar antes de enviar
+        if self.coalesce_window:
+            time.sleep(self.coalesce_window)
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for payload in encode_messages(self.sender, pending):
+            try:
+                self.transport.send(payload)
+                self.messages_sent += 1
+            except Exception as e:
+                # Sem reenvio: as entradas expiram pelo TTL do cache local
+                self.send_errors += 1
+                print(f"⚠️  Falha ao publicar invalidação: {e}")
+
+    def _receive(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("s") == self.sender:
+            return
+        self.messages_received += 1
+        for kind, keys in message.get("k", {}).items():
+            self.keys_received += len(keys)
+            self.on_invalidate(kind, keys)
+
+    def _gap(self):
+        """Mensagens podem ter sido perdidas (reconexão): descartar os caches locais"""
+        self.gaps += 1
+        if self.on_gap:
+            self.on_gap()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "transport": type(self.transport).__name__ if self.transport else None,
+            "published_keys": self.published_keys,
+            "messages_sent": self.messages_sent,
+            "messages_received": self.messages_received,
+            "keys_received": self.keys_received,
+            "send_errors": self.send_errors,
+            "gaps": self.gaps,
+        }
+
+
+class PostgresNotifyTransport:
+    """NOTIFY para publicar; uma conexão dedicada em LISTEN numa thread daemon"""
+
+    def __init__(self, engine, channel: str = "linkify_cache_invalidation", reconnect_delay: float = 1.0):
+        self.engine = engine
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, receive: Callable[[str], None], gap: Callable[[], None]):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, args=(receive, gap), name="cache-invalidation-listen",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    def send(self, payload: str):
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                               {"channel": self.channel, "payload": payload})
+            connection.commit()
+
+    def _connect(self):
+        # Conexão fora do pool: fica presa em LISTEN enquanto o worker viver
+        connection = self.engine.raw_connection()
+        connection.detach()
+        raw = connection.driver_connection
+        raw.autocommit = True
+        with raw.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return raw
+
+    def _listen(self, receive: Callable[[str], None], gap: Callable[[], None]):
+        first = True
+        while not self._stopping.is_set():
+            raw = None
+            try:
+                raw = self._connect()
+                if not first:
+                    gap()
+                first = False
+                while not self._stopping.is_set():
+                    if select.select([raw], [], [], 1.0)[0]:
+                        raw.poll()
+                        while raw.notifies:
+                            receive(raw.notifies.pop(0).payload)
+            except Exception:
+                print("⚠️  Conexão LISTEN de invalidação perdida; reconectando")
+                traceback.print_exc()
+                first = False
+                self._stopping.wait(self.reconnect_delay)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+
+
+class PollingTransport:
+    """Mensagens numa tabela do banco; cada worker lê as novas a cada poll_interval"""
+
+    # Ids abaixo do maior já lido podem ser confirmados fora de ordem por outras transações
+    OVERLAP = 100
+
+    def __init__(self, session_factory, model, poll_interval: float = 1.0, retention_seconds: float = 300.0):
+        self.session_factory = session_factory
+        self.model = model
+        self.retention = timedelta(seconds=retention_seconds)
+        self._task = PeriodicTask("cache-invalidation-poll", poll_interval, self._poll)
+        self._receive: Optional[Callable[[str], None]] = None
+        self._last_id = self._start_id = 0
+        self._seen: Set[int] = set()
+        self._pruned_at = 0.0
+
+    def start(self, receive: Callable[[str], None], gap: Callable[[], None]):
+        self._receive = receive
+        # Só interessam as mensagens publicadas depois que o worker subiu
+        db = self.session_factory()
+        try:
+            self._last_id = self._start_id = db.query(func.max(self.model.id)).scalar() or 0
+        finally:
+            db.close()
+        self._task.start()
+
+    def stop(self):
+        self._task.stop(run_final=False)
+
+    def send(self, payload: str):
+        db = self.session_factory()
+        try:
+            db.add(self.model(payload=payload))
+            # Limpeza das mensagens antigas no máximo uma vez por minuto
+            if time.monotonic() - self._pruned_at > 60:
+                self._pruned_at = time.monotonic()
+                cutoff = datetime.utcnow() - self.retention
+                db.query(self.model).filter(self.model.created_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _poll(self):
+        model = self.model
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(model.id, model.payload)
+                .filter(model.id > self._last_id - self.OVERLAP)
+                .order_by(model.id)
+                .all()
+            )
+        finally:
+            db.close()
+        for message_id, payload in rows:
+            if message_id in self._seen or message_id <= self._start_id:
+                continue
+            self._seen.add(message_id)
+            self._last_id = max(self._last_id, message_id)
+            self._receive(payload)
+        floor = self._last_id - self.OVERLAP
+        self._seen = {message_id for message_id in self._seen if message_id > floor}
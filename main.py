@@ -1,24 +1,26 @@
 import os
-import secrets
+import sys
+import json
+import asyncio
+import base64
+import hmac
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterator, List, Optional, Set, Union
 
-import bcrypt
-import uvicorn
-from fastapi import FastAPI, HTTPException, Depends, Request, Form, status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, HTTPException, Depends, Request, Form, Query, status
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from jose import JWTError, jwt
-from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, create_engine
+from pydantic import BaseModel, ValidationError, field_validator
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, ForeignKey, Index, bindparam, func, insert, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, relationship
-from authlib.integrations.starlette_client import OAuth
-import httpx
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
@@ -26,12 +28,120 @@ load_dotenv()
 
 # Importar configuração OAuth
 from oauth_config import setup_oauth, OAUTH_CONFIG
+from oauth_cache import oauth_cache_stats
+from cache import LRUTTLCache, RedirectEntry, TieredCache, UserSnapshot, redirect_ttl, tuple_codec
+from resp_cache import RespCacheBackend, RespClient
+from click_buffer import ClickBuffer
+from async_db import AsyncSession, create_async_session_factory, run_db
+from database_config import create_configured_engine, pool_options, pool_stats
+from short_codes import ShortCodeAllocator
+from click_events import ClickEventQueue
+from rollups import ClickRollup, day_bucket, hour_bucket, naive_utc
+from reaper import LinkReaper
+from bloom import ShortCodeFilter
+from pages import PageCache, page_response
+from static_assets import AssetManifest, asset_response
+from fast_json import FastJSONResponse
+from background import PeriodicTask
+from replicas import Replica, ReplicaRouter
+from invalidation import InvalidationBus, PollingTransport, PostgresNotifyTransport, multiple_workers
+from single_flight import SingleFlight
+from password_hashing import PasswordHasher, PasswordHasherBusy
 
 # Configurações
 SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
 ALGORITHM = "HS256"
+# Token do /api/metrics (Authorization: Bearer <token>); vazio desativa o endpoint
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Inicialização do banco no startup (desligar em produção e usar `python main.py init-db`)
+DB_INIT_ON_STARTUP = os.getenv('DB_INIT_ON_STARTUP', 'true').lower() in ('1', 'true', 'yes')
+SEED_TEST_USER = os.getenv('SEED_TEST_USER', 'false').lower() in ('1', 'true', 'yes')
+
+# Modo assíncrono do banco (AsyncSession com asyncpg/aiosqlite)
+DB_ASYNC = os.getenv('DB_ASYNC', 'false').lower() in ('1', 'true', 'yes')
+
+# Hash de senhas (bcrypt) em pool dedicado
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv('PASSWORD_HASH_MAX_QUEUE', '100'))
+
+# Cache de redirects (short_code -> original_url, expires_at, is_active)
+REDIRECT_CACHE_SIZE = int(os.getenv('REDIRECT_CACHE_SIZE', '10000'))
+REDIRECT_CACHE_TTL = float(os.getenv('REDIRECT_CACHE_TTL', '300'))
+# Misses simultâneos do mesmo código esperam uma única consulta (prazo em segundos)
+REDIRECT_LOOKUP_TIMEOUT = float(os.getenv('REDIRECT_LOOKUP_TIMEOUT', '5'))
+
+# Cache do usuário autenticado (username -> snapshot)
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '30'))
+
+# Backend dos caches acima: "memory" (por processo) ou "redis" (compartilhado entre workers,
+# com um LRU local de CACHE_LOCAL_TTL segundos na frente)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
+CACHE_URL = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'linkify:')
+CACHE_LOCAL_TTL = float(os.getenv('CACHE_LOCAL_TTL', '5'))
+CACHE_TIMEOUT = float(os.getenv('CACHE_TIMEOUT', '0.5'))
+
+# Invalidação dos caches locais entre workers: auto, notify, polling ou off.
+# auto: NOTIFY sempre no PostgreSQL; nos demais bancos, polling quando há sinais de
+# vários workers (WEB_CONCURRENCY > 1, gunicorn, uvicorn --workers).
+# Invalidações dentro da janela viram uma só mensagem.
+INVALIDATION_BUS = os.getenv('INVALIDATION_BUS', 'auto').lower()
+INVALIDATION_COALESCE_MS = float(os.getenv('INVALIDATION_COALESCE_MS', '50'))
+INVALIDATION_POLL_INTERVAL = float(os.getenv('INVALIDATION_POLL_INTERVAL', '1'))
+
+# Buffer de cliques (0 desativa e grava a cada redirect)
+CLICK_FLUSH_INTERVAL = float(os.getenv('CLICK_FLUSH_INTERVAL', '2'))
+CLICK_BUFFER_MAX_SIZE = int(os.getenv('CLICK_BUFFER_MAX_SIZE', '1000'))
+
+# Códigos curtos reservados por bloco no contador do banco
+SHORT_CODE_BLOCK_SIZE = int(os.getenv('SHORT_CODE_BLOCK_SIZE', '1000'))
+# Chave da permutação dos códigos: separada do SECRET_KEY, que pode ser rotacionado
+# (trocar a chave faz os códigos novos colidirem com os já emitidos). Sem ela, uma
+# chave aleatória é gerada no primeiro start e gravada em app_secrets.
+SHORT_CODE_SECRET = os.getenv('SHORT_CODE_SECRET', '')
+
+# Criação de links em lote
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '1000'))
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '100000'))
+
+# Contadores por usuário para /api/stats em O(1)
+USER_STATS_COUNTERS = os.getenv('USER_STATS_COUNTERS', 'false').lower() in ('1', 'true', 'yes')
+
+# Eventos de clique (click_events) gravados em background
+CLICK_EVENTS_ENABLED = os.getenv('CLICK_EVENTS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CLICK_EVENT_QUEUE_SIZE = int(os.getenv('CLICK_EVENT_QUEUE_SIZE', '10000'))
+CLICK_EVENT_QUEUE_POLICY = os.getenv('CLICK_EVENT_QUEUE_POLICY', 'drop_new')
+CLICK_EVENT_BATCH_SIZE = int(os.getenv('CLICK_EVENT_BATCH_SIZE', '500'))
+CLICK_EVENT_FLUSH_INTERVAL = float(os.getenv('CLICK_EVENT_FLUSH_INTERVAL', '1'))
+
+# Rollups de cliques por hora/dia (a partir de click_events)
+ROLLUP_INTERVAL = float(os.getenv('ROLLUP_INTERVAL', '60'))
+ROLLUP_BATCH_SIZE = int(os.getenv('ROLLUP_BATCH_SIZE', '10000'))
+ROLLUP_GAP_GRACE = float(os.getenv('ROLLUP_GAP_GRACE', '60'))
+
+# Remoção de links expirados sem dono (0 desativa o agendamento)
+REAPER_INTERVAL = float(os.getenv('REAPER_INTERVAL', '300'))
+REAPER_BATCH_SIZE = int(os.getenv('REAPER_BATCH_SIZE', '5000'))
+REAPER_GRACE_SECONDS = float(os.getenv('REAPER_GRACE_SECONDS', '0'))
+
+# Filtro de Bloom dos códigos: 404 sem consultar o banco para códigos inexistentes.
+# Com vários workers o filtro não responde 404 sozinho (links de outro processo podem
+# não ter chegado pelo INVALIDATION_BUS ou pelo refresh): a ausência é conferida no banco.
+BLOOM_FILTER_ENABLED = os.getenv('BLOOM_FILTER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+BLOOM_ERROR_RATE = float(os.getenv('BLOOM_ERROR_RATE', '0.01'))
+BLOOM_MIN_CAPACITY = int(os.getenv('BLOOM_MIN_CAPACITY', '100000'))
+BLOOM_REFRESH_INTERVAL = float(os.getenv('BLOOM_REFRESH_INTERVAL', '5'))
+BLOOM_REBUILD_INTERVAL = float(os.getenv('BLOOM_REBUILD_INTERVAL', '3600'))
+
+# Páginas pré-renderizadas e estáticos com hash: só em desenvolvimento uma thread procura
+# arquivos alterados a cada TEMPLATE_RELOAD_INTERVAL segundos
+TEMPLATE_RELOAD = os.getenv('TEMPLATE_RELOAD', 'false').lower() in ('1', 'true', 'yes')
+TEMPLATE_RELOAD_INTERVAL = float(os.getenv('TEMPLATE_RELOAD_INTERVAL', '2'))
+
 # Database setup
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./linkify.db')
 
@@ -39,7 +149,14 @@ DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./linkify.db')
 if DATABASE_URL.startswith('postgres://'):
     DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
 
-print(f"🗄️  Database: {DATABASE_URL.split('@')[0]}@[hidden]" if '@' in DATABASE_URL else f"🗄️  Database: {DATABASE_URL}")
+# Réplicas de leitura separadas por vírgula (vazio = tudo no primário)
+DATABASE_REPLICA_URLS = [
+    url.strip().replace('postgres://', 'postgresql://', 1)
+    for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+]
+REPLICA_HEALTH_INTERVAL = float(os.getenv('REPLICA_HEALTH_INTERVAL', '10'))
+# Após criar/apagar links, as leituras do usuário vão ao primário por N segundos (0 = desativado)
+READ_YOUR_WRITES_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', '0'))
 
 # Configurar engine baseado no tipo de banco
 try:
@@ -47,27 +164,63 @@ try:
         # Tentar importar psycopg2
         try:
             import psycopg2
-            engine = create_engine(DATABASE_URL)
-            print("✅ PostgreSQL configurado com psycopg2")
+            engine = create_configured_engine(DATABASE_URL)
         except ImportError:
             print("⚠️  psycopg2 não encontrado. Usando SQLite para desenvolvimento.")
             DATABASE_URL = 'sqlite:///./linkify.db'
-            engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+            engine = create_configured_engine(DATABASE_URL)
     else:
-        engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-        print("✅ SQLite configurado para desenvolvimento")
+        engine = create_configured_engine(DATABASE_URL)
 except Exception as e:
     print(f"⚠️  Erro na configuração do banco: {e}")
     print("🔄 Usando SQLite como fallback")
     DATABASE_URL = 'sqlite:///./linkify.db'
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    engine = create_configured_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Engine async adicional; o engine sync continua atendendo tarefas em background
+AsyncSessionLocal = create_async_session_factory(DATABASE_URL, **pool_options(DATABASE_URL)) if DB_ASYNC else None
+
+# Réplicas de leitura (redirect, listagem, estatísticas); escritas ficam no primário
+replica_router = ReplicaRouter(
+    [Replica(url, async_mode=DB_ASYNC) for url in DATABASE_REPLICA_URLS],
+    read_your_writes_seconds=READ_YOUR_WRITES_SECONDS
+)
+replica_health_task = PeriodicTask("replica-health", REPLICA_HEALTH_INTERVAL, replica_router.check_health)
+
+DBSession = Union[Session, AsyncSession]
+
+cache_client = RespClient(CACHE_URL, timeout=CACHE_TIMEOUT) if CACHE_BACKEND == 'redis' else None
+
+def _make_cache(name: str, max_size: int, ttl: float, value_type):
+    if cache_client is None:
+        return LRUTTLCache(max_size=max_size, ttl=ttl)
+    encode, decode = tuple_codec(value_type)
+    shared = RespCacheBackend(cache_client, f"{CACHE_KEY_PREFIX}{name}:", ttl, encode, decode)
+    return TieredCache(LRUTTLCache(max_size=max_size, ttl=min(ttl, CACHE_LOCAL_TTL)), shared)
+
+redirect_cache = _make_cache("redirect", REDIRECT_CACHE_SIZE, REDIRECT_CACHE_TTL, RedirectEntry)
+user_cache = _make_cache("user", USER_CACHE_SIZE, USER_CACHE_TTL, UserSnapshot)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown: schema opcional e tarefas em background"""
+    if DB_INIT_ON_STARTUP:
+        init_database(seed_test_user=SEED_TEST_USER)
+    static_assets.build()
+    page_cache.warm(FRONTEND_PAGES)
+    start_background_tasks()
+    try:
+        yield
+    finally:
+        stop_background_tasks()
+        if cache_client is not None:
+            cache_client.close()
+
 # FastAPI app
-app = FastAPI(title="Linkify", description="Encurtador de URLs profissional")
+app = FastAPI(title="Linkify", description="Encurtador de URLs profissional", lifespan=lifespan)
 
 # Session middleware
 app.add_middleware(SessionMiddleware, secret_key="your-secret-key-change-in-production")
@@ -86,10 +239,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Configurar OAuth
-oauth = setup_oauth(app)
+# OAuth registrado sob demanda: authlib só é importado no primeiro login social
+_oauth = None
+
+def get_oauth():
+    global _oauth
+    if _oauth is None:
+        _oauth = setup_oauth(app)
+    return _oauth
 
 # Security
 security = HTTPBearer()
@@ -97,6 +257,27 @@ security = HTTPBearer()
 # Templates
 templates = Jinja2Templates(directory="frontend/templates")
 
+# Estáticos com hash no nome; nos templates: {{ asset_url('css/style.css') }}
+static_assets = AssetManifest("frontend/static")
+templates.env.globals["asset_url"] = static_assets.url
+
+def _render_page(name: str) -> str:
+    """Renderiza sem request: url_for gera caminhos relativos, iguais para todo cliente"""
+    return templates.get_template(name).render(url_for=lambda route, **params: str(app.url_path_for(route, **params)))
+
+FRONTEND_PAGES = ("index.html", "dashboard.html", "login.html", "analytics.html", "settings.html", "profile.html")
+page_cache = PageCache(
+    _render_page,
+    template_dir="frontend/templates",
+    watch_dirs=("frontend/static",)
+)
+def _reload_frontend():
+    # Estáticos antes das páginas: o HTML re-renderizado usa os novos nomes com hash
+    static_assets.refresh()
+    page_cache.refresh()
+
+template_reload_task = PeriodicTask("template-reload", TEMPLATE_RELOAD_INTERVAL, _reload_frontend)
+
 # Static files
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 
@@ -128,15 +309,274 @@ class Link(Base):
     short_code = Column(String, unique=True, index=True)
     clicks = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=True)  
+    expires_at = Column(DateTime, nullable=True, index=True)
     is_active = Column(Boolean, default=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    redirect_status = Column(Integer, default=302, nullable=True)  # 301, 302, 307 ou 308
+    cache_max_age = Column(Integer, nullable=True)  # segundos de cache no navegador/CDN; vazio = no-store
     
     # Relationship
     owner = relationship("User", back_populates="links")
+    
+    __table_args__ = (
+        # Paginação keyset de GET /api/links
+        Index("ix_links_owner_created_id", "owner_id", "created_at", "id"),
+    )
+
+class ClickEvent(Base):
+    __tablename__ = "click_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    link_id = Column(Integer, ForeignKey("links.id", ondelete="CASCADE"), nullable=False, index=True)
+    ip_address = Column(String, nullable=True)
+    user_agent = Column(Text, nullable=True)
+    referer = Column(Text, nullable=True)
+    country = Column(String(10), nullable=True)
+    device_type = Column(String(50), nullable=True)
+    browser = Column(String(50), nullable=True)
+    os = Column(String(50), nullable=True)
+    clicked_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class LinkClicksHourly(Base):
+    __tablename__ = "link_clicks_hourly"
+    
+    link_id = Column(Integer, ForeignKey("links.id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    clicks = Column(BigInteger, nullable=False, default=0)
+
+class LinkClicksDaily(Base):
+    __tablename__ = "link_clicks_daily"
+    
+    link_id = Column(Integer, ForeignKey("links.id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    clicks = Column(BigInteger, nullable=False, default=0)
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String, primary_key=True)
+    last_event_id = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_links = Column(BigInteger, nullable=False, default=0)
+    total_clicks = Column(BigInteger, nullable=False, default=0)
+    active_links = Column(BigInteger, nullable=False, default=0)
+
+class CodeSequence(Base):
+    __tablename__ = "code_sequences"
+    
+    name = Column(String, primary_key=True)
+    next_value = Column(BigInteger, nullable=False, default=0)
+
+class AppSecret(Base):
+    """Chaves geradas pela aplicação quando não vêm do ambiente"""
+    __tablename__ = "app_secrets"
+    
+    name = Column(String, primary_key=True)
+    value = Column(Text, nullable=False)
+
+class CacheInvalidation(Base):
+    """Mensagens do barramento de invalidação no modo polling"""
+    __tablename__ = "cache_invalidations"
+    
+    id = Column(Integer, primary_key=True)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+short_code_allocator = ShortCodeAllocator(
+    SessionLocal,
+    CodeSequence,
+    secret=SHORT_CODE_SECRET,
+    block_size=SHORT_CODE_BLOCK_SIZE,
+    secret_model=AppSecret
+)
+
+def _aggregate_user_stats(db: Session, owner_id: int):
+    """COUNT, SUM e COUNT FILTER numa única consulta"""
+    return db.query(
+        func.count(Link.id),
+        func.coalesce(func.sum(Link.clicks), 0),
+        func.count(Link.id).filter(Link.is_active == True)
+    ).filter(Link.owner_id == owner_id).one()
+
+def _load_user_stats(db: Session, owner_id: int):
+    """Linha de contadores do usuário, criada a partir do agregado na primeira vez"""
+    stats = db.get(UserStats, owner_id)
+    if stats is not None:
+        return stats
+    total_links, total_clicks, active_links = _aggregate_user_stats(db, owner_id)
+    stats = UserStats(user_id=owner_id, total_links=total_links, total_clicks=total_clicks, active_links=active_links)
+    try:
+        with db.begin_nested():
+            db.add(stats)
+    except IntegrityError:
+        # Criada em paralelo por outra requisição
+        stats = db.get(UserStats, owner_id, populate_existing=True)
+    return stats
+
+def _bump_user_stats(db: Session, owner_id: Optional[int], links: int = 0, clicks: int = 0, active: int = 0):
+    """Ajusta os contadores na mesma transação da escrita (após o flush)"""
+    if not USER_STATS_COUNTERS or owner_id is None:
+        return
+    db.flush()
+    updated = db.query(UserStats).filter(UserStats.user_id == owner_id).update({
+        UserStats.total_links: UserStats.total_links + links,
+        UserStats.total_clicks: UserStats.total_clicks + clicks,
+        UserStats.active_links: UserStats.active_links + active
+    }, synchronize_session=False)
+    if not updated:
+        # Sem linha ainda: o agregado já inclui esta escrita
+        _load_user_stats(db, owner_id)
+
+def _apply_click_counters(db: Session, counts: dict):
+    """Repassa os cliques gravados pelo buffer para os contadores dos donos"""
+    if not USER_STATS_COUNTERS:
+        return
+    per_owner = {}
+    rows = db.query(Link.id, Link.owner_id).filter(Link.id.in_(list(counts)), Link.owner_id.isnot(None))
+    for link_id, owner_id in rows:
+        per_owner[owner_id] = per_owner.get(owner_id, 0) + counts[link_id]
+    if per_owner:
+        stmt = (
+            update(UserStats)
+            .where(UserStats.user_id == bindparam('owner'))
+            .values(total_clicks=UserStats.total_clicks + bindparam('clicks'))
+        )
+        db.connection().execute(stmt, [{'owner': owner, 'clicks': clicks} for owner, clicks in per_owner.items()])
+
+click_buffer = ClickBuffer(
+    SessionLocal,
+    Link,
+    flush_interval=CLICK_FLUSH_INTERVAL,
+    max_size=CLICK_BUFFER_MAX_SIZE,
+    on_flush=_apply_click_counters
+)
+
+click_events = ClickEventQueue(
+    SessionLocal,
+    ClickEvent,
+    Link,
+    max_size=CLICK_EVENT_QUEUE_SIZE,
+    policy=CLICK_EVENT_QUEUE_POLICY,
+    batch_size=CLICK_EVENT_BATCH_SIZE,
+    flush_interval=CLICK_EVENT_FLUSH_INTERVAL
+)
+
+click_rollup = ClickRollup(
+    SessionLocal,
+    ClickEvent,
+    LinkClicksHourly,
+    LinkClicksDaily,
+    RollupWatermark,
+    batch_size=ROLLUP_BATCH_SIZE,
+    gap_grace_seconds=ROLLUP_GAP_GRACE
+)
+rollup_task = PeriodicTask("click-rollup", ROLLUP_INTERVAL, click_rollup.run)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+def _invalidation_transport():
+    mode = INVALIDATION_BUS
+    if mode == 'auto':
+        if engine.dialect.name == 'postgresql':
+            # LISTEN é uma conexão parada: barato mesmo com um worker só
+            mode = 'notify'
+        elif multiple_workers():
+            mode = 'polling'
+        else:
+            # Processo único: polling a cada segundo sem ninguém para ouvir
+            return None
+    if mode == 'notify':
+        return PostgresNotifyTransport(engine)
+    if mode == 'polling':
+        return PollingTransport(SessionLocal, CacheInvalidation, poll_interval=INVALIDATION_POLL_INTERVAL)
+    return None
+
+def _apply_invalidation(kind: str, keys: List[str]):
+    if kind == "short_code":
+        # Não é invalidação: códigos criados em outro worker entram no filtro local
+        short_code_filter.add_many(keys)
+        return
+    cache = {"redirect": redirect_cache, "user": user_cache}.get(kind)
+    if cache is not None:
+        cache.invalidate_local(keys)
+
+def _clear_local_caches():
+    redirect_cache.clear_local()
+    user_cache.clear_local()
+    # Códigos novos podem ter se perdido junto: filtro volta a valer após o refresh
+    if short_code_filter.ready:
+        short_code_filter.mark_stale()
+        bloom_task.trigger()
+
+invalidation_bus = InvalidationBus(
+    _invalidation_transport(),
+    _apply_invalidation,
+    coalesce_window=INVALIDATION_COALESCE_MS / 1000,
+    on_gap=_clear_local_caches
+)
+
+def _invalidate_redirects(short_codes: List[str]):
+    redirect_cache.delete_many(short_codes)
+    invalidation_bus.publish("redirect", short_codes)
+
+link_reaper = LinkReaper(
+    SessionLocal,
+    Link,
+    dependent_models=(ClickEvent, LinkClicksHourly, LinkClicksDaily),
+    batch_size=REAPER_BATCH_SIZE,
+    grace_seconds=REAPER_GRACE_SECONDS,
+    on_reaped=_invalidate_redirects
+)
+reaper_task = PeriodicTask("link-reaper", REAPER_INTERVAL, link_reaper.run)
+
+short_code_filter = ShortCodeFilter(
+    SessionLocal,
+    Link,
+    error_rate=BLOOM_ERROR_RATE,
+    min_capacity=BLOOM_MIN_CAPACITY,
+    rebuild_interval=BLOOM_REBUILD_INTERVAL,
+    enabled=BLOOM_FILTER_ENABLED,
+    # Com outros workers criando links, ausência no filtro local não é prova de 404
+    authoritative=not multiple_workers()
+)
+bloom_task = PeriodicTask("short-code-filter", BLOOM_REFRESH_INTERVAL, short_code_filter.refresh)
+
+def _announce_short_codes(short_codes: List[str]):
+    """Adiciona ao filtro local e avisa os outros workers (sem esperar o refresh deles)"""
+    if not short_code_filter.enabled:
+        return
+    short_code_filter.add_many(short_codes)
+    invalidation_bus.publish("short_code", short_codes)
+
+def start_background_tasks():
+    invalidation_bus.start()
+    click_buffer.start()
+    if CLICK_EVENTS_ENABLED:
+        click_events.start()
+        rollup_task.start()
+    if REAPER_INTERVAL > 0:
+        reaper_task.start()
+    if BLOOM_FILTER_ENABLED:
+        short_code_filter.rebuild()
+        bloom_task.start()
+    if replica_router.enabled:
+        replica_health_task.start()
+    if TEMPLATE_RELOAD and TEMPLATE_RELOAD_INTERVAL > 0:
+        template_reload_task.start()
+
+def stop_background_tasks():
+    # Gravar cliques e eventos pendentes antes de encerrar
+    click_buffer.stop()
+    click_events.stop()
+    rollup_task.stop(run_final=False)
+    reaper_task.stop(run_final=False)
+    bloom_task.stop(run_final=False)
+    replica_health_task.stop(run_final=False)
+    template_reload_task.stop(run_final=False)
+    invalidation_bus.stop()
 
 # Pydantic models
 class UserCreate(BaseModel):
@@ -153,10 +593,30 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+REDIRECT_STATUSES = (301, 302, 307, 308)
+
 class LinkCreate(BaseModel):
     original_url: str
     custom_code: Optional[str] = None
     expires_at: Optional[datetime] = None
+    # Permanente (301/308) ou temporário (302/307); com cache_max_age os cliques
+    # repetidos são atendidos pelo navegador/CDN e deixam de ser contados
+    redirect_status: int = 302
+    cache_max_age: Optional[int] = None
+
+    @field_validator('redirect_status')
+    @classmethod
+    def check_redirect_status(cls, value: int) -> int:
+        if value not in REDIRECT_STATUSES:
+            raise ValueError(f"redirect_status must be one of {REDIRECT_STATUSES}")
+        return value
+
+    @field_validator('cache_max_age')
+    @classmethod
+    def check_cache_max_age(cls, value: Optional[int]) -> Optional[int]:
+        if value is not None and value < 0:
+            raise ValueError("cache_max_age must be >= 0")
+        return value or None
 
 class LinkResponse(BaseModel):
     id: int
@@ -166,6 +626,8 @@ class LinkResponse(BaseModel):
     created_at: datetime
     expires_at: Optional[datetime]
     is_active: bool
+    redirect_status: Optional[int] = 302
+    cache_max_age: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -180,19 +642,37 @@ class StatsResponse(BaseModel):
     active_links: int
 
 # Database dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+if DB_ASYNC:
+    async def get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+else:
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
 
 # Auth functions
+password_hasher = PasswordHasher(
+    rounds=BCRYPT_ROUNDS,
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE
+)
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_hasher.hash_sync(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return password_hasher.verify_sync(plain_password, hashed_password)
+
+async def run_password_hasher(method, *args):
+    """Executa no pool do bcrypt; fila cheia vira 503"""
+    try:
+        return await method(*args)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Too many authentication requests, try again", headers={"Retry-After": "1"})
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -204,7 +684,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def _get_user_by_username(db: Session, username: str):
+    return db.query(User).filter(User.username == username).first()
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: DBSession = Depends(get_db)) -> UserSnapshot:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -218,13 +701,74 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = await user_cache.aget(username)
     if user is None:
-        raise credentials_exception
+        db_user = await run_db(db, _get_user_by_username, username)
+        if db_user is None:
+            raise credentials_exception
+        user = UserSnapshot.from_user(db_user)
+        await user_cache.aset(username, user)
     return user
 
-def generate_short_code() -> str:
-    return secrets.token_urlsafe(6)
+def _session_factory(replica: Optional[Replica] = None):
+    """Fábrica de sessão da réplica ou, sem ela, do primário"""
+    if replica is None:
+        return AsyncSessionLocal if DB_ASYNC else SessionLocal
+    return replica.async_session_factory if DB_ASYNC else replica.session_factory
+
+def _read_session_factory(key: Optional[object] = None):
+    """Réplica escolhida pelo router ou o primário"""
+    return _session_factory(replica_router.choose(key))
+
+# Dependência somente leitura: pode cair numa réplica
+if DB_ASYNC:
+    async def get_user_read_db(current_user: UserSnapshot = Depends(get_current_user)):
+        async with _read_session_factory(current_user.id)() as db:
+            yield db
+else:
+    def get_user_read_db(current_user: UserSnapshot = Depends(get_current_user)):
+        db = _read_session_factory(current_user.id)()
+        try:
+            yield db
+        finally:
+            db.close()
+
+async def run_in_session(session_factory, func, *args):
+    """Executa numa sessão própria, independente da sessão da requisição"""
+    if DB_ASYNC:
+        async with session_factory() as db:
+            return await run_db(db, func, *args)
+    db = session_factory()
+    try:
+        return await run_db(db, func, *args)
+    finally:
+        db.close()
+
+def _insert_link(db: Session, custom_code: Optional[str], generated_code: Optional[str] = None, **fields):
+    """
+    Insere o link com um único INSERT; o índice único garante a unicidade do código
+    generated_code vem de short_code_allocator.aallocate() no handler, fora do run_sync
+    """
+    for _ in range(3):
+        # Nova tentativa (código gerado igual a um personalizado) usa o próximo do bloco
+        db_link = Link(short_code=custom_code or generated_code or short_code_allocator.allocate(), **fields)
+        generated_code = None
+        db.add(db_link)
+        try:
+            db.flush()
+            # Antes do commit: o código nunca fica visível no banco e ausente do filtro
+            _announce_short_codes([db_link.short_code])
+            _bump_user_stats(db, fields.get('owner_id'), links=1, active=1)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if custom_code:
+                raise HTTPException(status_code=400, detail="Custom code already exists")
+            # Código gerado coincidiu com um código personalizado: usar o próximo
+            continue
+        db.refresh(db_link)
+        return db_link
+    raise HTTPException(status_code=500, detail="Could not allocate a short code")
 
 # Create test user if not exists
 def create_test_user():
@@ -241,59 +785,62 @@ def create_test_user():
         print("✅ Test user created: testuser / testpass123")
     db.close()
 
+def init_database(seed_test_user: bool = False):
+    """Cria as tabelas e, opcionalmente, o usuário de teste"""
+    Base.metadata.create_all(bind=engine)
+    if seed_test_user:
+        create_test_user()
+
 # Routes
 
 # Frontend Routes
+@app.get("/assets/{path:path}")
+async def fingerprinted_asset(path: str, request: Request):
+    """Estáticos com hash no nome, pré-comprimidos e com cache imutável"""
+    asset = static_assets.get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return asset_response(request, asset)
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """Página inicial"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return page_response(request, page_cache.get("index.html"))
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """Dashboard principal"""
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    return page_response(request, page_cache.get("dashboard.html"))
 
 @app.get("/login", response_class=HTMLResponse)  
 async def login_page(request: Request):
     """Página de login"""
-    return templates.TemplateResponse("login.html", {"request": request})
+    return page_response(request, page_cache.get("login.html"))
 
 @app.get("/analytics", response_class=HTMLResponse)
 async def analytics_page(request: Request):
     """Página de analytics"""
-    return templates.TemplateResponse("analytics.html", {"request": request})
+    return page_response(request, page_cache.get("analytics.html"))
 
 @app.get("/settings", response_class=HTMLResponse)
 async def settings_page(request: Request):
     """Página de configurações"""
-    return templates.TemplateResponse("settings.html", {"request": request})
+    return page_response(request, page_cache.get("settings.html"))
 
 @app.get("/profile", response_class=HTMLResponse)
 async def profile_page(request: Request):
     """Página de perfil"""
-    return templates.TemplateResponse("profile.html", {"request": request})
+    return page_response(request, page_cache.get("profile.html"))
 
 @app.get("/debug", response_class=HTMLResponse)
 async def debug_page(request: Request):
     """Página de debug para testar autenticação"""
-    return templates.TemplateResponse("debug.html", {"request": request})
+    return page_response(request, page_cache.get("debug.html"))
 
 # API Routes
 
 # Auth endpoints
-@app.post("/api/auth/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    """Registrar novo usuário"""
-    # Check if user exists
-    db_user = db.query(User).filter(
-        (User.username == user.username) | (User.email == user.email)
-    ).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username or email already registered")
-    
-    # Create user
-    hashed_password = hash_password(user.password)
+def _create_user(db: Session, user: UserCreate, hashed_password: str):
     db_user = User(
         username=user.username,
         email=user.email,
@@ -304,17 +851,44 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     db.refresh(db_user)
     return db_user
 
+def _find_user_by_username_or_email(db: Session, username: str, email: str):
+    return db.query(User).filter(
+        (User.username == username) | (User.email == email)
+    ).first()
+
+@app.post("/api/auth/register", response_model=UserResponse)
+async def register(user: UserCreate, db: DBSession = Depends(get_db)):
+    """Registrar novo usuário"""
+    # Check if user exists
+    db_user = await run_db(db, _find_user_by_username_or_email, user.username, user.email)
+    if db_user:
+        raise HTTPException(status_code=400, detail="Username or email already registered")
+    
+    # Create user (bcrypt no pool dedicado)
+    hashed_password = await run_password_hasher(password_hasher.hash, user.password)
+    return await run_db(db, _create_user, user, hashed_password)
+
+def _update_password_hash(db: Session, user_id: int, hashed_password: str):
+    db.query(User).filter(User.id == user_id).update({User.hashed_password: hashed_password})
+    db.commit()
+
 @app.post("/api/auth/login", response_model=Token)
-def login(username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
+async def login(username: str = Form(...), password: str = Form(...), db: DBSession = Depends(get_db)):
     """Login do usuário"""
-    user = db.query(User).filter(User.username == username).first()
+    user = await run_db(db, _get_user_by_username, username)
     hashed_password = getattr(user, 'hashed_password', None) if user else None
-    if not user or not hashed_password or not verify_password(password, str(hashed_password)):
+    if not user or not hashed_password or not await run_password_hasher(password_hasher.verify, password, str(hashed_password)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    # Hash com custo desatualizado: regravar com o BCRYPT_ROUNDS atual
+    if password_hasher.needs_rehash(str(hashed_password)):
+        new_hash = await run_password_hasher(password_hasher.hash, password)
+        await run_db(db, _update_password_hash, user.id, new_hash)
+        password_hasher.rehashed += 1
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -323,68 +897,48 @@ def login(username: str = Form(...), password: str = Form(...), db: Session = De
 
 # User endpoints
 @app.get("/api/user/profile", response_model=UserResponse)
-def get_profile(current_user: User = Depends(get_current_user)):
+def get_profile(current_user: UserSnapshot = Depends(get_current_user)):
     """Obter perfil do usuário"""
     return current_user
 
 # Link endpoints
-@app.post("/api/links", response_model=LinkResponse)
-def create_link(link: LinkCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Criar novo link encurtado"""
-    # Generate or use custom short code
-    if link.custom_code:
-        existing_link = db.query(Link).filter(Link.short_code == link.custom_code).first()
-        if existing_link:
-            raise HTTPException(status_code=400, detail="Custom code already exists")
-        short_code = link.custom_code
-    else:
-        while True:
-            short_code = generate_short_code()
-            existing_link = db.query(Link).filter(Link.short_code == short_code).first()
-            if not existing_link:
-                break
-    
-    # Create link
-    db_link = Link(
+def _create_link(db: Session, link: LinkCreate, owner_id: int, generated_code: Optional[str]):
+    # Use custom short code or allocate one
+    return _insert_link(
+        db,
+        link.custom_code,
+        generated_code,
         original_url=link.original_url,
-        short_code=short_code,
         expires_at=link.expires_at,
-        owner_id=current_user.id
+        owner_id=owner_id,
+        redirect_status=link.redirect_status,
+        cache_max_age=link.cache_max_age
     )
-    db.add(db_link)
-    db.commit()
-    db.refresh(db_link)
-    return db_link
 
-@app.post("/api/links/demo")
-def create_demo_link(original_url: str = Form(...), custom_code: Optional[str] = Form(None), db: Session = Depends(get_db)):
-    """Criar link demo para usuários não autenticados (temporário, 1 hora)"""
-    # Generate or use custom short code
-    if custom_code:
-        existing_link = db.query(Link).filter(Link.short_code == custom_code).first()
-        if existing_link:
-            raise HTTPException(status_code=400, detail="Custom code already exists")
-        short_code = custom_code
-    else:
-        while True:
-            short_code = generate_short_code()
-            existing_link = db.query(Link).filter(Link.short_code == short_code).first()
-            if not existing_link:
-                break
-    
+@app.post("/api/links", response_model=LinkResponse)
+async def create_link(link: LinkCreate, current_user: UserSnapshot = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    """Criar novo link encurtado"""
+    generated_code = None if link.custom_code else await short_code_allocator.aallocate()
+    created = await run_db(db, _create_link, link, current_user.id, generated_code)
+    replica_router.pin(current_user.id)
+    # Write-through: o primeiro clique já acha o link no cache compartilhado
+    entry = _redirect_entry(created)
+    await redirect_cache.aset(created.short_code, entry, ttl=redirect_ttl(entry.expires_at, REDIRECT_CACHE_TTL))
+    return created
+
+def _create_demo_link(db: Session, original_url: str, custom_code: Optional[str], generated_code: Optional[str]):
     # Create temporary link (expires in 1 hour, no owner)
     from datetime import datetime, timedelta
     expires_at = datetime.utcnow() + timedelta(hours=1)
     
-    db_link = Link(
+    db_link = _insert_link(
+        db,
+        custom_code,
+        generated_code,
         original_url=original_url,
-        short_code=short_code,
         expires_at=expires_at,
         owner_id=None  # No owner for demo links
     )
-    db.add(db_link)
-    db.commit()
-    db.refresh(db_link)
     
     return {
         "id": db_link.id,
@@ -395,55 +949,439 @@ def create_demo_link(original_url: str = Form(...), custom_code: Optional[str] =
         "expires_at": db_link.expires_at.isoformat() if db_link.expires_at is not None else None
     }
 
+@app.post("/api/links/demo")
+async def create_demo_link(original_url: str = Form(...), custom_code: Optional[str] = Form(None), db: DBSession = Depends(get_db)):
+    """Criar link demo para usuários não autenticados (temporário, 1 hora)"""
+    generated_code = None if custom_code else await short_code_allocator.aallocate()
+    return await run_db(db, _create_demo_link, original_url, custom_code, generated_code)
+
+def _parse_bulk_body(body: bytes, content_type: str) -> list:
+    """Aceita um array JSON ou NDJSON (um objeto por linha)"""
+    try:
+        if 'ndjson' in content_type or 'jsonlines' in content_type:
+            return [json.loads(line) for line in body.splitlines() if line.strip()]
+        items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON body")
+    return items
+
+def _insert_bulk_chunk(db: Session, rows: List[dict], owner_id: int, custom_rows: Set[int]) -> List[Union[int, str]]:
+    """
+    INSERT multi-linha de um chunk; em conflito, isola as linhas com savepoints
+    Retorna o id de cada linha ou a mensagem de erro; custom_rows = posições com código personalizado
+    """
+    stmt = insert(Link).returning(Link.id, sort_by_parameter_order=True)
+    _announce_short_codes([row['short_code'] for row in rows])
+    try:
+        ids = [row.id for row in db.execute(stmt, rows)]
+        _bump_user_stats(db, owner_id, links=len(ids), active=len(ids))
+        db.commit()
+        return ids
+    except IntegrityError:
+        db.rollback()
+    
+    # Algum código foi criado em paralelo: inserir linha a linha
+    results: List[Union[int, str]] = []
+    for position, row in enumerate(rows):
+        custom = position in custom_rows
+        for _ in range(3):
+            try:
+                with db.begin_nested():
+                    results.append(db.execute(stmt, [row]).scalar_one())
+                break
+            except IntegrityError:
+                taken = _short_code_taken(db, row['short_code'])
+                if custom or not taken:
+                    # Violação que não é do código (ex.: dono removido no meio do lote)
+                    results.append("Custom code already exists" if taken else "Could not create link")
+                    break
+                # Código gerado coincidiu com um existente: usar o próximo
+                row['short_code'] = short_code_allocator.allocate()
+                _announce_short_codes([row['short_code']])
+        else:
+            results.append("Could not allocate a short code")
+    created = sum(1 for result in results if not isinstance(result, str))
+    _bump_user_stats(db, owner_id, links=created, active=created)
+    db.commit()
+    return results
+
+def _short_code_taken(db: Session, short_code: str) -> bool:
+    return db.query(Link.id).filter(Link.short_code == short_code).first() is not None
+
+def _create_links_bulk(items: list, owner_id: int) -> Iterator[str]:
+    """Cria os links por chunk (uma transação cada) e gera um resultado NDJSON por item"""
+    seen_codes = set()
+    db = SessionLocal()
+    try:
+        for start in range(0, len(items), BULK_CHUNK_SIZE):
+            chunk = items[start:start + BULK_CHUNK_SIZE]
+            results = {}
+            links = {}
+            for index, item in enumerate(chunk, start):
+                try:
+                    link = LinkCreate.model_validate(item)
+                except ValidationError as e:
+                    results[index] = {"index": index, "status": "error", "error": e.errors(include_url=False)}
+                    continue
+                if link.custom_code:
+                    if link.custom_code in seen_codes:
+                        results[index] = {"index": index, "status": "error", "error": "Custom code already exists"}
+                        continue
+                    seen_codes.add(link.custom_code)
+                links[index] = link
+            
+            # Códigos personalizados: os que estão no cache de redirect já existem (um multi-get);
+            # os demais numa consulta por chunk
+            custom_codes = [link.custom_code for link in links.values() if link.custom_code]
+            if custom_codes:
+                cached = redirect_cache.get_many(custom_codes)
+                taken = {code for code, entry in zip(custom_codes, cached) if entry is not None}
+                unknown = [code for code in custom_codes if code not in taken]
+                if unknown:
+                    taken.update(row[0] for row in db.query(Link.short_code).filter(Link.short_code.in_(unknown)))
+                for index, link in list(links.items()):
+                    if link.custom_code in taken:
+                        results[index] = {"index": index, "status": "error", "error": "Custom code already exists"}
+                        del links[index]
+            
+            generated = iter(short_code_allocator.allocate_many(sum(1 for link in links.values() if not link.custom_code)))
+            rows = [
+                {
+                    "original_url": link.original_url,
+                    "short_code": link.custom_code or next(generated),
+                    "expires_at": link.expires_at,
+                    "owner_id": owner_id,
+                    "redirect_status": link.redirect_status,
+                    "cache_max_age": link.cache_max_age,
+                }
+                for link in links.values()
+            ]
+            if rows:
+                custom_rows = {position for position, link in enumerate(links.values()) if link.custom_code}
+                ids = _insert_bulk_chunk(db, rows, owner_id, custom_rows)
+                replica_router.pin(owner_id)
+                for index, row, link_id in zip(links, rows, ids):
+                    if isinstance(link_id, str):
+                        results[index] = {"index": index, "status": "error", "error": link_id}
+                    else:
+                        results[index] = {
+                            "index": index,
+                            "status": "created",
+                            "id": link_id,
+                            "short_code": row["short_code"],
+                            "original_url": row["original_url"],
+                        }
+            
+            for index in sorted(results):
+                yield json.dumps(results[index], default=str) + "\n"
+    finally:
+        db.close()
+
+@app.post("/api/links/bulk")
+async def create_links_bulk(request: Request, current_user: UserSnapshot = Depends(get_current_user)):
+    """Criar links em lote a partir de um array JSON ou NDJSON (resultado em NDJSON)"""
+    items = _parse_bulk_body(await request.body(), request.headers.get('content-type', ''))
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Bulk requests are limited to {BULK_MAX_ITEMS} items")
+    
+    return StreamingResponse(_create_links_bulk(items, current_user.id), media_type="application/x-ndjson")
+
+LINK_FIELDS = tuple(LinkResponse.model_fields)
+
+def _encode_cursor(created_at: datetime, link_id: int) -> str:
+    """Cursor opaco com a posição (created_at, id) do último item"""
+    raw = json.dumps([created_at.isoformat(), link_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, link_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(link_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _get_user_links(db: Session, owner_id: int, columns: list, limit: Optional[int], after):
+    query = db.query(*columns).filter(Link.owner_id == owner_id)
+    if after is not None:
+        query = query.filter(tuple_(Link.created_at, Link.id) < tuple_(*after))
+    query = query.order_by(Link.created_at.desc(), Link.id.desc())
+    if limit is not None:
+        # Um item extra indica se existe próxima página
+        query = query.limit(limit + 1)
+    return query.all()
+
 @app.get("/api/links", response_model=list[LinkResponse])
-def get_links(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Obter links do usuário"""
-    links = db.query(Link).filter(Link.owner_id == current_user.id).order_by(Link.created_at.desc()).all()
-    return links
+async def get_links(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_pending: bool = False,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: DBSession = Depends(get_user_read_db)
+):
+    """Obter links do usuário (paginação keyset opcional via limit/cursor)"""
+    selected = LINK_FIELDS
+    if fields:
+        selected = tuple(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+        unknown = set(selected) - set(LINK_FIELDS)
+        if unknown or not selected:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    after = _decode_cursor(cursor) if cursor else None
+    columns = [getattr(Link, name) for name in dict.fromkeys(selected + ('created_at', 'id'))]
+    rows = await run_db(db, _get_user_links, current_user.id, columns, limit, after)
+    
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    # Tuplas de colunas viram dicts direto (as colunas selecionadas vêm primeiro),
+    # sem validação pelo response_model: a saída é a mesma, byte a byte
+    links = [dict(zip(selected, row)) for row in rows]
+    
+    # Somar cliques que ainda estão no buffer
+    if include_pending and 'clicks' in selected:
+        pending = click_buffer.pending_for(row.id for row in rows)
+        for row, item in zip(rows, links):
+            if row.id in pending:
+                item['clicks'] += pending[row.id]
+    
+    return FastJSONResponse(links, headers=headers)
 
-@app.delete("/api/links/{link_id}")
-def delete_link(link_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Deletar link"""
-    link = db.query(Link).filter(Link.id == link_id, Link.owner_id == current_user.id).first()
+def _delete_link(db: Session, link_id: int, owner_id: int) -> Optional[str]:
+    link = db.query(Link).filter(Link.id == link_id, Link.owner_id == owner_id).first()
     if not link:
-        raise HTTPException(status_code=404, detail="Link not found")
+        return None
     
+    short_code = link.short_code
     db.delete(link)
+    _bump_user_stats(db, owner_id, links=-1, clicks=-(link.clicks or 0), active=-1 if link.is_active else 0)
     db.commit()
+    return short_code
+
+@app.delete("/api/links/{link_id}")
+async def delete_link(link_id: int, current_user: UserSnapshot = Depends(get_current_user), db: DBSession = Depends(get_db)):
+    """Deletar link"""
+    short_code = await run_db(db, _delete_link, link_id, current_user.id)
+    if short_code is None:
+        raise HTTPException(status_code=404, detail="Link not found")
+    
+    replica_router.pin(current_user.id)
+    await redirect_cache.adelete(short_code)
+    invalidation_bus.publish("redirect", [short_code])
     return {"message": "Link deleted successfully"}
 
+def _get_stats(db: Session, owner_id: int, include_pending: bool):
+    # Na réplica só lemos a linha de contadores; sem ela, o agregado
+    stats = None
+    if USER_STATS_COUNTERS:
+        stats = db.get(UserStats, owner_id) if db.info.get('read_only') else _load_user_stats(db, owner_id)
+    if stats is not None:
+        total_links, total_clicks, active_links = stats.total_links, stats.total_clicks, stats.active_links
+        db.commit()
+    else:
+        total_links, total_clicks, active_links = _aggregate_user_stats(db, owner_id)
+    if include_pending:
+        pending_ids = click_buffer.pending_ids()
+        if pending_ids:
+            own_ids = db.query(Link.id).filter(Link.owner_id == owner_id, Link.id.in_(pending_ids)).all()
+            total_clicks += sum(click_buffer.pending_for(row[0] for row in own_ids).values())
+    
+    return {
+        "total_links": total_links,
+        "total_clicks": total_clicks,
+        "active_links": active_links
+    }
+
 @app.get("/api/stats", response_model=StatsResponse)
-def get_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_stats(include_pending: bool = False, current_user: UserSnapshot = Depends(get_current_user), db: DBSession = Depends(get_user_read_db)):
     """Obter estatísticas do usuário"""
-    total_links = db.query(Link).filter(Link.owner_id == current_user.id).count()
-    total_clicks = db.query(Link).filter(Link.owner_id == current_user.id).with_entities(Link.clicks).all()
-    total_clicks = sum([click[0] for click in total_clicks])
-    active_links = db.query(Link).filter(Link.owner_id == current_user.id, Link.is_active == True).count()
-    
-    return StatsResponse(
-        total_links=total_links,
-        total_clicks=total_clicks,
-        active_links=active_links
+    return FastJSONResponse(await run_db(db, _get_stats, current_user.id, include_pending))
+
+metrics_security = HTTPBearer(auto_error=False)
+
+def require_metrics_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_security)):
+    """Métricas expõem estado interno: só com o METRICS_TOKEN"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@app.get("/api/metrics", dependencies=[Depends(require_metrics_token)])
+def get_metrics():
+    """Métricas internas (caches)"""
+    return {
+        "db_pool": pool_stats(engine),
+        "replicas": replica_router.stats(),
+        "cache_invalidation": invalidation_bus.stats(),
+        "oauth_cache": oauth_cache_stats(),
+        "redirect_cache": redirect_cache.stats(),
+        "redirect_lookups": redirect_lookups.stats(),
+        "user_cache": user_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "click_buffer": click_buffer.stats(),
+        "short_codes": short_code_allocator.stats(),
+        "click_events": click_events.stats(),
+        "click_rollup": click_rollup.stats(),
+        "link_reaper": link_reaper.stats(),
+        "short_code_filter": short_code_filter.stats(),
+        "pages": page_cache.stats(),
+        "static_assets": static_assets.stats()
+    }
+
+TIMESERIES_GRANULARITIES = {
+    "hour": (LinkClicksHourly, hour_bucket, timedelta(hours=1), timedelta(days=1)),
+    "day": (LinkClicksDaily, day_bucket, timedelta(days=1), timedelta(days=30)),
+}
+TIMESERIES_MAX_POINTS = 2000
+
+def _get_timeseries(db: Session, link_id: int, owner_id: int, model, start: datetime, end: datetime):
+    if not db.query(Link.id).filter(Link.id == link_id, Link.owner_id == owner_id).first():
+        return None
+    rows = db.query(model.bucket, model.clicks).filter(
+        model.link_id == link_id,
+        model.bucket >= start,
+        model.bucket <= end
+    ).all()
+    return {bucket: clicks for bucket, clicks in rows}
+
+@app.get("/api/links/{link_id}/timeseries")
+async def get_link_timeseries(
+    link_id: int,
+    granularity: str = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: DBSession = Depends(get_user_read_db)
+):
+    """Série temporal de cliques do link, lida apenas dos rollups"""
+    if granularity not in TIMESERIES_GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+    model, to_bucket, step, default_range = TIMESERIES_GRANULARITIES[granularity]
+    # ?start=...Z chega com fuso; os buckets são UTC sem tzinfo
+    end = to_bucket(naive_utc(end) or datetime.utcnow())
+    start = to_bucket(naive_utc(start) or end - default_range)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / step >= TIMESERIES_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {TIMESERIES_MAX_POINTS} points")
+    
+    counts = await run_db(db, _get_timeseries, link_id, current_user.id, model, start, end)
+    if counts is None:
+        raise HTTPException(status_code=404, detail="Link not found")
+    
+    # Buckets sem cliques entram com zero
+    points = []
+    bucket = start
+    while bucket <= end:
+        points.append({"bucket": bucket, "clicks": counts.get(bucket, 0)})
+        bucket += step
+    return FastJSONResponse({"link_id": link_id, "granularity": granularity, "points": points})
+
+def _find_active_link(db: Session, short_code: str):
+    return db.query(Link).filter(Link.short_code == short_code, Link.is_active == True).first()
+
+def _redirect_entry(link) -> RedirectEntry:
+    return RedirectEntry(
+        link_id=link.id,
+        original_url=str(link.original_url),
+        expires_at=link.expires_at,
+        is_active=bool(link.is_active),
+        redirect_status=link.redirect_status or 302,
+        cache_max_age=link.cache_max_age
     )
 
+def _find_redirect_entry(db: Session, short_code: str) -> Optional[RedirectEntry]:
+    link = _find_active_link(db, short_code)
+    return _redirect_entry(link) if link else None
+
+redirect_lookups = SingleFlight(timeout=REDIRECT_LOOKUP_TIMEOUT)
+
+async def _lookup_redirect(short_code: str, filter_hit: bool = False) -> Optional[RedirectEntry]:
+    """Consulta do código (uma por vez por código) e preenchimento do cache"""
+    replica = replica_router.choose()
+    entry = await run_in_session(_session_factory(replica), _find_redirect_entry, short_code)
+    if entry is None and replica is not None:
+        # Link recém-criado pode ainda não ter chegado à réplica
+        entry = await run_in_session(_session_factory(), _find_redirect_entry, short_code)
+    if entry is None:
+        # Só é falso positivo quando o filtro foi consultado e disse "talvez"
+        if filter_hit:
+            short_code_filter.record_false_positive()
+        return None
+    # Criado em outro worker e ainda não propagado: o filtro aprende aqui
+    short_code_filter.learn(short_code)
+    await redirect_cache.aset(short_code, entry, ttl=redirect_ttl(entry.expires_at, REDIRECT_CACHE_TTL))
+    return entry
+
+def _client_ip(request: Request) -> Optional[str]:
+    forwarded = request.headers.get('x-forwarded-for')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.client.host if request.client else None
+
+def _redirect_cache_control(entry: RedirectEntry) -> str:
+    """max-age do link limitado ao expires_at; sem cache, no-store para contar todo clique"""
+    max_age = entry.cache_max_age or 0
+    if max_age and entry.expires_at is not None:
+        max_age = min(max_age, int((entry.expires_at - datetime.utcnow()).total_seconds()))
+    if max_age <= 0:
+        return "no-store"
+    return f"public, max-age={max_age}"
+
 # Redirect endpoint
 @app.get("/{short_code}")
-def redirect_link(short_code: str, db: Session = Depends(get_db)):
+async def redirect_link(short_code: str, request: Request):
     """Redirecionar link encurtado"""
-    link = db.query(Link).filter(Link.short_code == short_code, Link.is_active == True).first()
-    if not link:
+    entry = await redirect_cache.aget(short_code)
+    if entry is None:
+        # Código certamente inexistente: 404 sem consultar o banco
+        filter_hit = short_code_filter.lookup(short_code)
+        if filter_hit is False:
+            raise HTTPException(status_code=404, detail="Link not found")
+        # Misses concorrentes do mesmo código compartilham a consulta (e o 404)
+        try:
+            entry = await redirect_lookups.do(short_code, lambda: _lookup_redirect(short_code, bool(filter_hit)))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Link lookup timed out, try again", headers={"Retry-After": "1"})
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Link not found")
+    
+    if not entry.is_active:
         raise HTTPException(status_code=404, detail="Link not found")
     
     # Check if expired
-    expires_at = getattr(link, 'expires_at')
-    if expires_at is not None and datetime.utcnow() > expires_at:
+    if entry.expires_at is not None and datetime.utcnow() > entry.expires_at:
         raise HTTPException(status_code=410, detail="Link expired")
     
-    # Increment clicks using update query
-    db.query(Link).filter(Link.id == link.id).update({Link.clicks: Link.clicks + 1})
-    db.commit()
+    # Increment clicks (write-behind, gravado em lote pelo buffer)
+    await click_buffer.aadd(entry.link_id)
+    
+    # Evento de clique vai para a fila; a gravação acontece em background
+    if CLICK_EVENTS_ENABLED:
+        headers = request.headers
+        await click_events.apublish({
+            "link_id": entry.link_id,
+            "ip_address": _client_ip(request),
+            "user_agent": headers.get('user-agent'),
+            "referer": headers.get('referer'),
+            "country": headers.get('x-vercel-ip-country') or headers.get('cf-ipcountry'),
+            "clicked_at": datetime.utcnow()
+        })
     
-    return RedirectResponse(url=str(link.original_url), status_code=302)
+    return RedirectResponse(
+        url=entry.original_url,
+        status_code=entry.redirect_status,
+        headers={"Cache-Control": _redirect_cache_control(entry)}
+    )
 
 # ====== ROTAS OAUTH2 ======
 
@@ -465,7 +1403,7 @@ async def oauth_login(provider: str, request: Request):
         redirect_uri = request.url_for('oauth_callback', provider=provider)
         
         # Obter cliente OAuth
-        client = oauth.create_client(provider)
+        client = get_oauth().create_client(provider)
         if not client:
             raise HTTPException(status_code=500, detail="Erro na configuração OAuth")
         
@@ -476,14 +1414,14 @@ async def oauth_login(provider: str, request: Request):
         return RedirectResponse(url="/?error=oauth_failed", status_code=302)
 
 @app.get("/auth/{provider}/callback")
-async def oauth_callback(provider: str, request: Request):
+async def oauth_callback(provider: str, request: Request, db: DBSession = Depends(get_db)):
     """Callback OAuth para processar o retorno do provedor"""
     if provider not in ['google', 'github', 'microsoft', 'apple']:
         raise HTTPException(status_code=400, detail="Provedor não suportado")
     
     try:
         # Obter cliente OAuth
-        client = oauth.create_client(provider)
+        client = get_oauth().create_client(provider)
         if not client:
             raise HTTPException(status_code=500, detail="Erro na configuração OAuth")
         
@@ -496,47 +1434,49 @@ async def oauth_callback(provider: str, request: Request):
         if user_info is None:
             raise HTTPException(status_code=500, detail="Erro ao obter dados do usuário")
         
-        # Criar ou encontrar usuário no banco
-        db = SessionLocal()
-        try:
-            user = get_or_create_oauth_user(db, user_info, provider)
-            
-            # Criar token JWT
-            access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-            access_token = create_access_token(
-                data={"sub": user.username}, expires_delta=access_token_expires
-            )
-            
-            # Redirecionar para dashboard com token
-            response = RedirectResponse(url="/dashboard", status_code=302)
-            
-            # Detectar se está em produção (HTTPS)
-            is_production = os.getenv('VERCEL_ENV') == 'production' or request.url.scheme == 'https'
-            
-            response.set_cookie(
-                key="linkify_token",
-                value=access_token,
-                httponly=True,
-                secure=is_production,  # HTTPS em produção
-                samesite="lax",
-                max_age=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-            )
-            
-            return response
-            
-        finally:
-            db.close()
-            
+        # Criar ou encontrar usuário no banco (fora do event loop)
+        username = await run_db(db, get_or_create_oauth_user, user_info, provider)
+        
+        # Criar token JWT
+        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        access_token = create_access_token(
+            data={"sub": username}, expires_delta=access_token_expires
+        )
+        
+        # Redirecionar para dashboard com token
+        response = RedirectResponse(url="/dashboard", status_code=302)
+        
+        # Detectar se está em produção (HTTPS)
+        is_production = os.getenv('VERCEL_ENV') == 'production' or request.url.scheme == 'https'
+        
+        response.set_cookie(
+            key="linkify_token",
+            value=access_token,
+            httponly=True,
+            secure=is_production,  # HTTPS em produção
+            samesite="lax",
+            max_age=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        )
+        
+        return response
+        
     except Exception as e:
         print(f"Erro OAuth {provider}: {str(e)}")
         # Redirecionar para login com erro
         return RedirectResponse(url="/?error=oauth_failed", status_code=302)
 
+async def _id_token_claims(client, token) -> dict:
+    """Claims do id_token, validadas com o JWKS em cache"""
+    # authorize_access_token já valida o id_token quando houve nonce
+    if token.get('userinfo'):
+        return token['userinfo']
+    return await client.parse_id_token(token, nonce=None)
+
 async def get_user_info_from_provider(client, token, provider: str) -> Optional[dict]:
     """Obtém informações do usuário do provedor OAuth"""
     try:
         if provider == 'google':
-            resp = await client.parse_id_token(token)
+            resp = await _id_token_claims(client, token)
             return {
                 'id': str(resp['sub']),
                 'email': resp['email'],
@@ -546,12 +1486,12 @@ async def get_user_info_from_provider(client, token, provider: str) -> Optional[
             }
         
         elif provider == 'github':
-            # Obter dados do usuário
-            user_resp = await client.get('user', token=token)
+            # Dados do usuário e emails (pode estar privado) em paralelo
+            user_resp, email_resp = await asyncio.gather(
+                client.get('user', token=token),
+                client.get('user/emails', token=token),
+            )
             user_data = user_resp.json()
-            
-            # Obter email (pode estar privado)
-            email_resp = await client.get('user/emails', token=token)
             emails = email_resp.json()
             primary_email = next((email['email'] for email in emails if email['primary']), user_data.get('email'))
             
@@ -564,7 +1504,7 @@ async def get_user_info_from_provider(client, token, provider: str) -> Optional[
             }
         
         elif provider == 'microsoft':
-            resp = await client.parse_id_token(token)
+            resp = await _id_token_claims(client, token)
             return {
                 'id': str(resp['sub']),
                 'email': resp['email'],
@@ -574,7 +1514,7 @@ async def get_user_info_from_provider(client, token, provider: str) -> Optional[
             }
         
         elif provider == 'apple':
-            resp = await client.parse_id_token(token)
+            resp = await _id_token_claims(client, token)
             return {
                 'id': str(resp['sub']),
                 'email': resp['email'],
@@ -587,8 +1527,21 @@ async def get_user_info_from_provider(client, token, provider: str) -> Optional[
         print(f"Erro ao obter dados do usuário {provider}: {str(e)}")
         return None
 
-def get_or_create_oauth_user(db: Session, user_info: dict, provider: str):
-    """Cria ou encontra usuário OAuth no banco de dados"""
+def _free_username(db: Session, username: str) -> str:
+    """Primeiro username livre (username, username1, ...) com uma única consulta por prefixo"""
+    pattern = username.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    taken = {
+        name for (name,) in
+        db.query(User.username).filter(User.username.like(pattern, escape='\\'))
+    }
+    candidate, counter = username, 1
+    while candidate in taken:
+        candidate = f"{username}{counter}"
+        counter += 1
+    return candidate
+
+def get_or_create_oauth_user(db: Session, user_info: dict, provider: str) -> str:
+    """Cria ou encontra usuário OAuth no banco de dados; retorna o username"""
     # Procurar usuário existente por OAuth ID ou email
     user = db.query(User).filter(
         (User.oauth_provider == provider) & (User.oauth_id == user_info['id'])
@@ -607,16 +1560,11 @@ def get_or_create_oauth_user(db: Session, user_info: dict, provider: str):
             })
             db.commit()
             db.refresh(user)
+            user_cache.delete(user.username)
+            invalidation_bus.publish("user", [user.username])
         else:
-            # Criar novo usuário
-            username = user_info['username']
-            counter = 1
-            original_username = username
-            
-            # Garantir username único
-            while db.query(User).filter(User.username == username).first():
-                username = f"{original_username}{counter}"
-                counter += 1
+            # Criar novo usuário com username único
+            username = _free_username(db, user_info['username'])
             
             user = User(
                 username=username,
@@ -631,19 +1579,24 @@ def get_or_create_oauth_user(db: Session, user_info: dict, provider: str):
     
     db.commit()
     db.refresh(user)
-    return user
-
-# Inicialização automática do banco em produção
-try:
-    # Criar tabelas automaticamente
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully")
-except Exception as e:
-    print(f"⚠️  Database initialization warning: {e}")
+    return user.username
 
 if __name__ == "__main__":
-    # Create test user
-    create_test_user()
+    # Passo explícito de schema para deploys com DB_INIT_ON_STARTUP=false
+    if sys.argv[1:] == ["init-db"]:
+        init_database(seed_test_user=SEED_TEST_USER)
+        print("✅ Database tables created successfully")
+        sys.exit(0)
+
+    # Remoção manual de links expirados (ex.: cron com REAPER_INTERVAL=0)
+    if sys.argv[1:] == ["reap-expired"]:
+        print(f"🧹 Links expirados removidos: {link_reaper.run()}")
+        sys.exit(0)
+
+    import uvicorn
+
+    # Create tables and test user
+    init_database(seed_test_user=True)
     
     # Create frontend directories
     os.makedirs("frontend/templates", exist_ok=True)
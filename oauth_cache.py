@@ -0,0 +1,195 @@
+"""
+Cache dos documentos de discovery OAuth/OpenID e dos JWKS dos provedores
+
+Os documentos ficam em memória e, se OAUTH_CACHE_DIR for definido, em disco
+(um JSON por URL), para que novos workers não precisem buscá-los de novo. O
+diretório precisa ser privado (0700, do mesmo usuário): quem grava nele decide
+quais chaves validam os ID tokens. Perto do fim do TTL a entrada é renovada em
+background (refresh-ahead) enquanto a atual é servida.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Discovery muda raramente; JWKS gira com mais frequência
+OAUTH_DISCOVERY_TTL = float(os.getenv('OAUTH_DISCOVERY_TTL', '86400'))
+OAUTH_JWKS_TTL = float(os.getenv('OAUTH_JWKS_TTL', '3600'))
+# Fração final do TTL em que a renovação em background é disparada
+OAUTH_CACHE_REFRESH_AHEAD = float(os.getenv('OAUTH_CACHE_REFRESH_AHEAD', '0.2'))
+# Intervalo mínimo entre buscas forçadas do JWKS (kid desconhecido)
+OAUTH_JWKS_MIN_REFRESH = float(os.getenv('OAUTH_JWKS_MIN_REFRESH', '60'))
+# Diretório privado do cache em disco (padrão: só memória)
+OAUTH_CACHE_DIR = os.getenv('OAUTH_CACHE_DIR', '')
+
+Fetcher = Callable[[str], Awaitable[Dict[str, Any]]]
+# Levanta ValueError se o documento não serve para a URL
+Validator = Callable[[str, Dict[str, Any]], None]
+
+
+def _is_private(st: os.stat_result) -> bool:
+    """Do usuário atual e sem escrita por grupo/outros"""
+    if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+        return False
+    return not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class DocumentCache:
+    """Documentos JSON por URL com TTL, refresh-ahead e persistência em disco"""
+
+    def __init__(self, name: str, ttl: float, refresh_ahead: float = 0.2,
+                 cache_dir: Optional[str] = None, min_force_interval: float = 0.0):
+        self.name = name
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.cache_dir = cache_dir or None
+        self.min_force_interval = min_force_interval
+        self._data: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._tasks = set()
+        self.hits = 0
+        self.misses = 0
+        self.disk_loads = 0
+        self.fetches = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    async def get(self, url: str, fetch: Fetcher, force: bool = False,
+                  validate: Optional[Validator] = None) -> Dict[str, Any]:
+        """Retorna o documento da URL, buscando só quando ausente, expirado ou forçado"""
+        entry = self._data.get(url)
+        if entry is None:
+            entry = self._load_from_disk(url, validate)
+
+        if entry is not None:
+            document, fetched_at = entry
+            age = time.time() - fetched_at
+            if force and age < self.min_force_interval:
+                force = False
+            if not force and age < self.ttl:
+                self.hits += 1
+                if age >= self.ttl * (1 - self.refresh_ahead):
+                    self._schedule_refresh(url, fetch, validate)
+                return document
+
+        self.misses += 1
+        try:
+            return await self._fetch(url, fetch, validate)
+        except Exception:
+            self.errors += 1
+            if entry is None:
+                raise
+            # Provedor indisponível: servir a versão anterior
+            return entry[0]
+
+    async def _fetch(self, url: str, fetch: Fetcher, validate: Optional[Validator] = None) -> Dict[str, Any]:
+        document = await fetch(url)
+        if validate:
+            validate(url, document)
+        self.fetches += 1
+        self._store(url, document, time.time())
+        return document
+
+    def _schedule_refresh(self, url: str, fetch: Fetcher, validate: Optional[Validator]):
+        with self._lock:
+            if url in self._refreshing:
+                return
+            self._refreshing.add(url)
+
+        async def refresh():
+            try:
+                await self._fetch(url, fetch, validate)
+                self.refreshes += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️  Erro ao renovar {self.name} ({url}): {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(url)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _store(self, url: str, document: Dict[str, Any], fetched_at: float):
+        with self._lock:
+            self._data[url] = (document, fetched_at)
+        if not self.cache_dir:
+            return
+        try:
+            if not self._private_dir():
+                return
+            path = self._path(url)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"url": url, "fetched_at": fetched_at, "document": document}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Não foi possível gravar o cache OAuth em disco: {e}")
+
+    def _private_dir(self) -> bool:
+        """Cria o diretório com 0700; recusa diretórios de outro usuário ou abertos"""
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        st = os.lstat(self.cache_dir)
+        if not stat.S_ISDIR(st.st_mode) or not _is_private(st) or st.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+            print(f"⚠️  Cache OAuth em disco ignorado: {self.cache_dir} não é um diretório privado deste usuário")
+            self.cache_dir = None
+            return False
+        return True
+
+    def _load_from_disk(self, url: str, validate: Optional[Validator] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        if not self.cache_dir:
+            return None
+        try:
+            if not self._private_dir():
+                return None
+            fd = os.open(self._path(url), os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+            with os.fdopen(fd) as f:
+                if not _is_private(os.fstat(f.fileno())):
+                    return None
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if payload.get("url") != url:
+            return None
+        try:
+            if validate:
+                validate(url, payload["document"])
+            entry = (payload["document"], float(payload["fetched_at"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+        with self._lock:
+            self._data[url] = entry
+        self.disk_loads += 1
+        return entry
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(f"{self.name}:{url}".encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._data),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_loads": self.disk_loads,
+            "fetches": self.fetches,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
+
+
+discovery_cache = DocumentCache('discovery', OAUTH_DISCOVERY_TTL, OAUTH_CACHE_REFRESH_AHEAD, OAUTH_CACHE_DIR)
+jwks_cache = DocumentCache('jwks', OAUTH_JWKS_TTL, OAUTH_CACHE_REFRESH_AHEAD, OAUTH_CACHE_DIR,
+                           min_force_interval=OAUTH_JWKS_MIN_REFRESH)
+
+
+def oauth_cache_stats() -> Dict[str, Any]:
+    return {"discovery": discovery_cache.stats(), "jwks": jwks_cache.stats()}
@@ -0,0 +1,70 @@
+"""
+Cliente OAuth2 do authlib que usa o cache de discovery/JWKS
+
+Importado apenas por setup_oauth, para manter o authlib fora do import do app.
+"""
+import base64
+import json
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from authlib.integrations.starlette_client import StarletteOAuth2App
+
+from oauth_cache import discovery_cache, jwks_cache
+
+
+def _token_kid(id_token: str) -> Optional[str]:
+    """kid do cabeçalho do JWT (sem validar assinatura)"""
+    try:
+        header = id_token.split('.', 1)[0]
+        header += '=' * (-len(header) % 4)
+        return json.loads(base64.urlsafe_b64decode(header)).get('kid')
+    except (ValueError, AttributeError):
+        return None
+
+
+def validate_server_metadata(metadata_url: str, metadata: Dict[str, Any]):
+    """issuer no mesmo host HTTPS da URL de discovery e jwks_uri em HTTPS"""
+    expected = urlparse(metadata_url)
+    issuer = urlparse(str(metadata.get('issuer') or ''))
+    if issuer.scheme != 'https' or issuer.hostname != expected.hostname:
+        raise ValueError(f"issuer inesperado para {metadata_url}: {metadata.get('issuer')!r}")
+    jwks_uri = metadata.get('jwks_uri')
+    if jwks_uri and urlparse(str(jwks_uri)).scheme != 'https':
+        raise ValueError(f"jwks_uri inválido para {metadata_url}: {jwks_uri!r}")
+
+
+class CachedOAuth2App(StarletteOAuth2App):
+    """Discovery e JWKS vêm do cache; o JWKS só é rebuscado para um kid desconhecido"""
+
+    async def _fetch_json(self, url: str) -> Dict[str, Any]:
+        async with self.client_cls(**self.client_kwargs) as client:
+            resp = await client.request('GET', url, withhold_token=True)
+            resp.raise_for_status()
+            return resp.json()
+
+    async def load_server_metadata(self):
+        if self._server_metadata_url:
+            metadata = await discovery_cache.get(self._server_metadata_url, self._fetch_json,
+                                                 validate=validate_server_metadata)
+            self.server_metadata.update(metadata)
+        return self.server_metadata
+
+    async def fetch_jwk_set(self, force=False):
+        metadata = await self.load_server_metadata()
+        uri = metadata.get('jwks_uri')
+        if not uri:
+            raise RuntimeError('Missing "jwks_uri" in metadata')
+        # Buscas forçadas respeitam o intervalo mínimo do cache
+        return await jwks_cache.get(uri, self._fetch_json, force=force)
+
+    async def parse_id_token(self, token, nonce, claims_options=None):
+        metadata = await self.load_server_metadata()
+        uri = metadata.get('jwks_uri')
+        kid = _token_kid(token.get('id_token', ''))
+        if uri and kid:
+            jwk_set = await jwks_cache.get(uri, self._fetch_json)
+            if kid not in {key.get('kid') for key in jwk_set.get('keys', [])}:
+                # Chave nova (rotação): rebuscar antes de validar
+                await self.fetch_jwk_set(force=True)
+        return await super().parse_id_token(token, nonce, claims_options=claims_options)
@@ -3,7 +3,6 @@ Configuração OAuth2 para integração com provedores sociais
 """
 
 import os
-from authlib.integrations.starlette_client import OAuth
 
 # Configurações OAuth2 dos provedores
 OAUTH_CONFIG = {
@@ -45,12 +44,17 @@ OAUTH_CONFIG = {
 
 def setup_oauth(app):
     """Configura OAuth2 para a aplicação"""
+    # Import adiado: authlib é pesado e só é necessário no login social
+    from authlib.integrations.starlette_client import OAuth
+    from oauth_clients import CachedOAuth2App
+
     oauth = OAuth()
     
-    # Configurar cada provedor OAuth
+    # Configurar cada provedor OAuth (discovery e JWKS via cache compartilhado)
     for provider, config in OAUTH_CONFIG.items():
         oauth.register(
             name=provider,
+            client_cls=CachedOAuth2App,
             **config
         )
     
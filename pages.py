@@ -0,0 +1,177 @@
+"""
+Páginas HTML pré-renderizadas e pré-comprimidas
+
+Cada página é renderizada uma vez, guardada em bytes junto com as variantes
+gzip (e brotli, se instalado) e servida com ETag forte e 304 em If-None-Match.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Revalidar sempre: o ETag torna a revalidação um 304 barato
+PAGE_CACHE_CONTROL = "no-cache"
+
+# Sufixo do ETag por variante (cada codificação é uma representação diferente)
+_ETAG_SUFFIX = {"gzip": "-gz", "br": "-br"}
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> str:
+    """Melhor codificação aceita pelo cliente (br > gzip > identity)"""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        token, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca, como pede o If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+class CompressedBody:
+    """Conteúdo em bytes com variantes comprimidas e um ETag forte por variante"""
+
+    def __init__(self, body: bytes):
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.digest = digest
+        self.variants: Dict[str, Tuple[bytes, str]] = {"identity": (body, f'"{digest}"')}
+        compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(body, quality=11)
+        for encoding, data in compressed.items():
+            # Páginas muito pequenas não compensam a compressão
+            if len(data) < len(body):
+                self.variants[encoding] = (data, f'"{digest}{_ETAG_SUFFIX[encoding]}"')
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[str, bytes, str]:
+        """(encoding, corpo, etag) da variante para o Accept-Encoding"""
+        encoding = choose_encoding(accept_encoding, self.variants)
+        body, etag = self.variants[encoding]
+        return encoding, body, etag
+
+    def headers(self, encoding: str, etag: str, cache_control: str = PAGE_CACHE_CONTROL) -> Dict[str, str]:
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": cache_control}
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return headers
+
+
+class RenderedPage(CompressedBody):
+    """Página HTML pronta para servir"""
+
+    def __init__(self, html: str):
+        super().__init__(html.encode("utf-8"))
+
+
+def page_response(request: Request, page: CompressedBody, media_type: str = "text/html",
+                  cache_control: str = PAGE_CACHE_CONTROL) -> Response:
+    """Resposta com a variante negociada ou 304 quando o ETag confere"""
+    encoding, body, etag = page.select(request.headers.get("accept-encoding"))
+    headers = page.headers(encoding, etag, cache_control)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def directory_signature(*directories: Optional[str]) -> Tuple:
+    """(caminho, mtime) de todos os arquivos, para detectar alterações"""
+    signature = []
+    for directory in directories:
+        if not directory or not os.path.isdir(directory):
+            continue
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    signature.append((path, os.stat(path).st_mtime_ns))
+                except OSError:
+                    continue
+    return tuple(sorted(signature))
+
+
+class PageCache:
+    """Páginas renderizadas por nome de template; refresh() re-renderiza quando algum arquivo observado muda"""
+
+    def __init__(self, render: Callable[[str], str], template_dir: Optional[str] = None,
+                 watch_dirs: Tuple[str, ...] = ()):
+        self.render = render
+        self.template_dir = template_dir
+        # Diretórios extras (ex.: estáticos, cujos nomes com hash entram no HTML)
+        self.watch_dirs = watch_dirs
+        self._pages: Dict[str, RenderedPage] = {}
+        self._lock = threading.Lock()
+        self._signature = self._template_signature()
+        self.renders = 0
+        self.reloads = 0
+        self.hits = 0
+
+    def get(self, name: str) -> RenderedPage:
+        page = self._pages.get(name)
+        if page is not None:
+            self.hits += 1
+            return page
+        page = RenderedPage(self.render(name))
+        with self._lock:
+            self._pages[name] = page
+            self.renders += 1
+        return page
+
+    def warm(self, names: Iterable[str]):
+        """Renderiza as páginas no startup; templates ausentes ficam para o primeiro acesso"""
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"⚠️  Não foi possível pré-renderizar {name}: {e}")
+
+    def refresh(self) -> bool:
+        """Varre os diretórios e re-renderiza as páginas se algo mudou; roda numa thread, fora das requisições"""
+        signature = self._template_signature()
+        if signature == self._signature:
+            return False
+        pages: Dict[str, RenderedPage] = {}
+        for name in list(self._pages):
+            try:
+                pages[name] = RenderedPage(self.render(name))
+            except Exception as e:
+                # Fica para o primeiro acesso, que mostra o erro
+                print(f"⚠️  Não foi possível re-renderizar {name}: {e}")
+        with self._lock:
+            self._pages = pages
+            self._signature = signature
+            self.renders += len(pages)
+            self.reloads += 1
+        return True
+
+    def _template_signature(self) -> Tuple:
+        return directory_signature(self.template_dir, *self.watch_dirs)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "pages": len(self._pages),
+            "renders": self.renders,
+            "reloads": self.reloads,
+            "hits": self.hits,
+            "brotli": brotli is not None,
+        }
@@ -0,0 +1,101 @@
+"""
+Hash de senhas (bcrypt) num pool de threads dedicado
+
+O bcrypt libera o GIL, então um pool próprio e pequeno limita quantos hashes
+rodam ao mesmo tempo sem ocupar o threadpool que atende as demais rotas.
+"""
+import asyncio
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import bcrypt
+
+_COST_RE = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class PasswordHasherBusy(Exception):
+    """Fila de hashes cheia"""
+
+
+class PasswordHasher:
+    """bcrypt com custo configurável, concorrência limitada e métricas de fila"""
+
+    def __init__(self, rounds: int = 12, max_workers: int = 2, max_queue: int = 0):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_queue = max_queue  # 0 = sem limite
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    # Operações síncronas (executadas dentro do pool)
+    def hash_sync(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds)).decode('utf-8')
+
+    @staticmethod
+    def verify_sync(password: str, hashed_password: str) -> bool:
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+        except ValueError:
+            # Hash corrompido ou em formato desconhecido
+            return False
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True quando o hash salvo usa um custo diferente do configurado"""
+        match = _COST_RE.match(hashed_password or "")
+        return match is None or int(match.group(1)) != self.rounds
+
+    # Operações assíncronas (não bloqueiam o event loop)
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.hash_sync, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(self.verify_sync, password, hashed_password)
+
+    async def _submit(self, func, *args):
+        with self._lock:
+            queued = self._pending - self._running
+            if self.max_queue and queued >= self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy("Fila de hash de senhas cheia")
+            self._pending += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._pending - self._running)
+        future = self._executor.submit(self._run, func, *args)
+        return await asyncio.wrap_future(future)
+
+    def _run(self, func, *args):
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self.completed += 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        with self._lock:
+            running = self._running
+            queued = self._pending - self._running
+        return {
+            "rounds": self.rounds,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": queued,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
@@ -0,0 +1,91 @@
+"""
+Remoção de links expirados em lotes
+
+Cada lote seleciona até batch_size links vencidos pelo índice de expires_at,
+apaga os dados dependentes (eventos e rollups) e os links na mesma transação.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+class LinkReaper:
+    """Apaga links sem dono cujo expires_at já passou"""
+
+    def __init__(self, session_factory, link_model, dependent_models: Sequence = (), batch_size: int = 5000,
+                 grace_seconds: float = 0.0, on_reaped: Optional[Callable[[List[str]], None]] = None):
+        self.session_factory = session_factory
+        self.link_model = link_model
+        self.dependent_models = dependent_models
+        self.batch_size = batch_size
+        self.grace = timedelta(seconds=grace_seconds)
+        self.on_reaped = on_reaped
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.batches = 0
+        self.reclaimed = 0
+        self.last_run_reclaimed = 0
+        self.last_run_seconds = 0.0
+        self.last_run_at: Optional[datetime] = None
+
+    def run(self) -> int:
+        """Apaga todos os links vencidos; retorna quantos foram removidos"""
+        with self._lock:
+            started = time.perf_counter()
+            cutoff = datetime.utcnow() - self.grace
+            total = 0
+            while True:
+                removed = self._reap_batch(cutoff)
+                total += removed
+                if removed < self.batch_size:
+                    break
+            self.runs += 1
+            self.reclaimed += total
+            self.last_run_reclaimed = total
+            self.last_run_seconds = round(time.perf_counter() - started, 3)
+            self.last_run_at = datetime.utcnow()
+            if total:
+                print(f"🧹 {total} links expirados removidos")
+            return total
+
+    def _reap_batch(self, cutoff: datetime) -> int:
+        link = self.link_model
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(link.id, link.short_code)
+                .filter(link.expires_at < cutoff, link.owner_id.is_(None))
+                .order_by(link.expires_at)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not rows:
+                return 0
+            ids = [row.id for row in rows]
+            # SQLite não aplica ON DELETE CASCADE sem PRAGMA foreign_keys
+            for model in self.dependent_models:
+                db.query(model).filter(model.link_id.in_(ids)).delete(synchronize_session=False)
+            db.query(link).filter(link.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.batches += 1
+        if self.on_reaped:
+            self.on_reaped([row.short_code for row in rows])
+        return len(rows)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "runs": self.runs,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "reclaimed": self.reclaimed,
+            "last_run_reclaimed": self.last_run_reclaimed,
+            "last_run_seconds": self.last_run_seconds,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
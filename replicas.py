@@ -0,0 +1,145 @@
+"""
+Roteamento de leituras para réplicas do banco
+
+Dependências somente leitura escolhem uma réplica saudável em round-robin;
+escritas continuam no primário. Réplicas que perdem a conexão saem do rodízio
+até o próximo health check bem-sucedido. Sem réplicas saudáveis, tudo vai
+para o primário.
+"""
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, make_url, text
+from sqlalchemy.orm import sessionmaker
+
+from async_db import create_async_session_factory
+from database_config import create_configured_engine, pool_options, pool_stats
+
+# Marcador nas sessões de réplica (db.info), para o código evitar escritas
+READ_ONLY_INFO = {"read_only": True}
+
+
+class Replica:
+    """Engine e fábricas de sessão de uma réplica, com o estado de saúde"""
+
+    def __init__(self, database_url: str, async_mode: bool = False):
+        url = make_url(database_url)
+        self.name = f"{url.host}/{url.database}" if url.host else (url.database or database_url)
+        self.engine = create_configured_engine(database_url)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine,
+                                            info=READ_ONLY_INFO)
+        self.async_session_factory = None
+        if async_mode:
+            self.async_session_factory = create_async_session_factory(database_url, **pool_options(database_url))
+            self.async_session_factory.configure(info=READ_ONLY_INFO)
+        self.healthy = True
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+        # Conexão perdida durante uma requisição: fora do rodízio na hora
+        engines = [self.engine]
+        if self.async_session_factory is not None:
+            engines.append(self.async_session_factory.kw["bind"].sync_engine)
+        for engine in engines:
+            event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect:
+            self.mark_unhealthy(context.original_exception)
+
+    def mark_unhealthy(self, error: BaseException):
+        message = str(error).splitlines()[0][:200] if str(error) else type(error).__name__
+        if self.healthy:
+            print(f"⚠️  Réplica {self.name} fora do rodízio: {message}")
+        self.healthy = False
+        self.failures += 1
+        self.last_error = message
+
+    def check(self) -> bool:
+        """SELECT 1 na réplica; volta ao rodízio quando responde"""
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except Exception as e:
+            self.mark_unhealthy(e)
+            return False
+        self.healthy = True
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "pool": pool_stats(self.engine),
+        }
+
+
+class ReplicaRouter:
+    """Round-robin entre réplicas saudáveis, com janela opcional de read-your-writes"""
+
+    def __init__(self, replicas: List[Replica], read_your_writes_seconds: float = 0.0):
+        self.replicas = replicas
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._pinned: Dict[object, float] = {}
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.pinned_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self, key: Optional[object] = None) -> Optional[Replica]:
+        """Réplica para a próxima leitura; None = ler do primário"""
+        if not self.replicas:
+            return None
+        if key is not None and self.is_pinned(key):
+            self.pinned_reads += 1
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.primary_reads += 1
+            return None
+        self.replica_reads += 1
+        return healthy[next(self._counter) % len(healthy)]
+
+    def pin(self, key: object):
+        """Leituras de `key` vão ao primário durante a janela (o usuário vê o que acabou de gravar)"""
+        if not self.replicas or self.read_your_writes_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._pinned[key] = now + self.read_your_writes_seconds
+            # Limpeza oportunista das janelas vencidas
+            if len(self._pinned) > 10000:
+                self._pinned = {k: until for k, until in self._pinned.items() if until > now}
+
+    def is_pinned(self, key: object) -> bool:
+        until = self._pinned.get(key)
+        if until is None:
+            return False
+        if until > time.monotonic():
+            return True
+        with self._lock:
+            self._pinned.pop(key, None)
+        return False
+
+    def check_health(self):
+        for replica in self.replicas:
+            replica.check()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "replicas": [replica.stats() for replica in self.replicas],
+            "healthy": sum(1 for replica in self.replicas if replica.healthy),
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "pinned_reads": self.pinned_reads,
+            "read_your_writes_seconds": self.read_your_writes_seconds,
+        }
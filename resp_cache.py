@@ -0,0 +1,233 @@
+"""
+Backend de cache compartilhado via protocolo Redis (RESP)
+
+Cliente mínimo sobre socket, com pool de conexões e pipeline: várias chaves
+numa única ida e volta. Funciona com Redis, Valkey, KeyDB ou qualquer
+servidor compatível. Falhas de rede viram miss e o backend fica fora por
+alguns segundos, sem derrubar as requisições.
+"""
+import queue
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from urllib.parse import unquote, urlparse
+
+from cache import CacheBackend
+
+
+class RespError(Exception):
+    """Resposta de erro do servidor (-ERR ...)"""
+
+
+def encode_command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8")
+        elif isinstance(arg, (int, float)):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+class RespConnection:
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def send(self, commands: Sequence[Sequence[Any]]):
+        self.sock.sendall(b"".join(encode_command(*command) for command in commands))
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Conexão encerrada pelo servidor de cache")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            return RespError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Resposta incompleta do servidor de cache")
+            return data[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            return None if length < 0 else [self.read_reply() for _ in range(length)]
+        raise ConnectionError(f"Resposta RESP inválida: {line[:20]!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RespClient:
+    """Pool de conexões RESP; redis://[:senha@]host:porta/db"""
+
+    def __init__(self, url: str, timeout: float = 0.5, max_connections: int = 16):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[RespConnection]" = queue.LifoQueue(max_connections)
+
+    def _connect(self) -> RespConnection:
+        connection = RespConnection(self.host, self.port, self.timeout)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.username, self.password) if self.username else ("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            connection.send(setup)
+            for _ in setup:
+                reply = connection.read_reply()
+                if isinstance(reply, RespError):
+                    connection.close()
+                    raise reply
+        return connection
+
+    def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """Envia todos os comandos de uma vez e lê as respostas na ordem"""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            connection.send(commands)
+            replies = [connection.read_reply() for _ in commands]
+        except Exception:
+            connection.close()
+            raise
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def execute(self, *args) -> Any:
+        return self.pipeline([args])[0]
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RespCacheBackend(CacheBackend):
+    """Cache compartilhado entre workers: MGET, SET PX e DEL com prefixo por cache"""
+
+    blocking = True
+
+    def __init__(self, client: RespClient, prefix: str, ttl: float,
+                 encode: Callable[[Any], bytes], decode: Callable[[bytes], Any],
+                 retry_after: float = 5.0):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.encode = encode
+        self.decode = decode
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.round_trips = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _run(self, commands: Sequence[Sequence[Any]]) -> Optional[List[Any]]:
+        """Executa o pipeline; em erro, backend fica fora por retry_after segundos"""
+        if not self.available:
+            return None
+        try:
+            replies = self.client.pipeline(commands)
+        except (OSError, RespError) as e:
+            with self._lock:
+                self.errors += 1
+                self.last_error = str(e)[:200]
+                if self._down_until <= time.monotonic():
+                    print(f"⚠️  Cache compartilhado indisponível ({e}); usando só o cache local")
+                self._down_until = time.monotonic() + self.retry_after
+            return None
+        self.round_trips += 1
+        return replies
+
+    def get(self, key: Any) -> Optional[Any]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Iterable[Any]) -> List[Optional[Any]]:
+        """Todas as chaves num único MGET"""
+        keys = list(keys)
+        if not keys:
+            return []
+        replies = self._run([("MGET", *(self.prefix + str(key) for key in keys))])
+        raw = replies[0] if replies else [None] * len(keys)
+        values = []
+        for data in raw:
+            value = None
+            if data is not None:
+                try:
+                    value = self.decode(data)
+                except ValueError:
+                    value = None
+            values.append(value)
+        hits = sum(1 for value in values if value is not None)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(values) - hits
+        return values
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self.delete(key)
+            return
+        self._run([("SET", self.prefix + str(key), self.encode(value), "PX", max(1, int(ttl * 1000)))])
+
+    def delete(self, key: Any) -> bool:
+        replies = self._run([("DEL", self.prefix + str(key))])
+        return bool(replies and replies[0])
+
+    def delete_many(self, keys: Iterable[Any]):
+        keys = [self.prefix + str(key) for key in keys]
+        if keys:
+            self._run([("DEL", *keys)])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "resp",
+            "server": f"{self.client.host}:{self.client.port}/{self.client.db}",
+            "available": self.available,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "round_trips": self.round_trips,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
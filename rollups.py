@@ -0,0 +1,161 @@
+"""
+Rollups incrementais de cliques por link (por hora e por dia)
+
+Cada execução lê apenas os eventos de click_events acima da marca d'água
+(último id processado), soma por bucket e faz upsert nas tabelas de rollup.
+
+Ids são reservados na inserção mas ficam visíveis no commit, fora de ordem:
+um buraco na sequência pode ser uma transação ainda aberta. A marca d'água
+só passa de um buraco depois que ele ficou aberto por gap_grace_seconds
+(transação desfeita ou id descartado pela sequence).
+"""
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+WATERMARK_NAME = "click_rollups"
+
+
+def naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Datetimes com fuso viram UTC sem tzinfo, como os gravados no banco"""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class ClickRollup:
+    """Mantém os rollups hourly/daily a partir dos eventos de clique"""
+
+    def __init__(self, session_factory, event_model, hourly_model, daily_model, watermark_model,
+                 batch_size: int = 10000, gap_grace_seconds: float = 60.0):
+        self.session_factory = session_factory
+        self.event_model = event_model
+        self.hourly_model = hourly_model
+        self.daily_model = daily_model
+        self.watermark_model = watermark_model
+        self.batch_size = batch_size
+        self.gap_grace = gap_grace_seconds
+        # Primeiro id faltante -> quando o buraco foi visto pela primeira vez
+        self._gaps: Dict[int, float] = {}
+        self.runs = 0
+        self.processed = 0
+        self.gaps_skipped = 0
+
+    def run(self) -> int:
+        """Processa todos os eventos novos; retorna quantos foram agregados"""
+        total = 0
+        while True:
+            processed = self._run_batch()
+            total += processed
+            if processed < self.batch_size:
+                break
+        self.runs += 1
+        self.processed += total
+        return total
+
+    def _run_batch(self) -> int:
+        event = self.event_model
+        db = self.session_factory()
+        try:
+            watermark = self._lock_watermark(db)
+            rows = (
+                db.query(event.id, event.link_id, event.clicked_at)
+                .filter(event.id > watermark.last_event_id)
+                .order_by(event.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            ready = self._settled_prefix(watermark.last_event_id, rows)
+            if not ready:
+                db.rollback()
+                return 0
+
+            now = datetime.utcnow()
+            hourly: Dict[Tuple[int, datetime], int] = defaultdict(int)
+            daily: Dict[Tuple[int, datetime], int] = defaultdict(int)
+            for row in ready:
+                clicked_at = row.clicked_at or now
+                hourly[(row.link_id, hour_bucket(clicked_at))] += 1
+                daily[(row.link_id, day_bucket(clicked_at))] += 1
+
+            self._upsert(db, self.hourly_model, hourly)
+            self._upsert(db, self.daily_model, daily)
+            watermark.last_event_id = ready[-1].id
+            watermark.updated_at = datetime.utcnow()
+            db.commit()
+            self._gaps = {missing: seen for missing, seen in self._gaps.items() if missing > ready[-1].id}
+            return len(ready)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _settled_prefix(self, last_event_id: int, rows):
+        """Eventos contíguos a partir da marca d'água; para no primeiro buraco ainda dentro da carência"""
+        now = time.monotonic()
+        expected = last_event_id + 1
+        ready = []
+        for row in rows:
+            if row.id != expected:
+                first_seen = self._gaps.setdefault(expected, now)
+                if now - first_seen < self.gap_grace:
+                    break
+                self.gaps_skipped += 1
+            ready.append(row)
+            expected = row.id + 1
+        return ready
+
+    def _lock_watermark(self, db):
+        """Linha da marca d'água bloqueada (FOR UPDATE) para um único executor por vez"""
+        model = self.watermark_model
+        watermark = db.query(model).filter(model.name == WATERMARK_NAME).with_for_update().first()
+        if watermark is None:
+            watermark = model(name=WATERMARK_NAME, last_event_id=0)
+            db.add(watermark)
+            db.flush()
+        return watermark
+
+    @staticmethod
+    def _upsert(db, model, counts: Dict[Tuple[int, datetime], int]):
+        """INSERT ... ON CONFLICT DO UPDATE somando os cliques do bucket"""
+        if not counts:
+            return
+        rows = [{"link_id": link_id, "bucket": bucket, "clicks": clicks} for (link_id, bucket), clicks in counts.items()]
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(model)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[model.link_id, model.bucket],
+                set_={"clicks": model.clicks + stmt.excluded.clicks},
+            )
+            db.execute(stmt, rows)
+            return
+        # Outros bancos: UPDATE e INSERT quando o bucket ainda não existe
+        for row in rows:
+            updated = db.query(model).filter(model.link_id == row["link_id"], model.bucket == row["bucket"]).update(
+                {model.clicks: model.clicks + row["clicks"]}, synchronize_session=False
+            )
+            if not updated:
+                db.add(model(**row))
+
+    def stats(self):
+        return {
+            "runs": self.runs,
+            "processed": self.processed,
+            "batch_size": self.batch_size,
+            "open_gaps": len(self._gaps),
+            "gaps_skipped": self.gaps_skipped,
+        }
@@ -0,0 +1,166 @@
+"""
+Alocação de códigos curtos sem consulta de unicidade
+
+Cada código vem de um contador reservado em blocos no banco, passa por uma
+permutação com chave (rede de Feistel) e é codificado em base62 - os códigos
+são únicos por construção e não sequenciais para quem vê de fora.
+
+A chave da permutação vem de SHORT_CODE_SECRET ou, sem ele, de uma chave
+aleatória gerada no primeiro start e gravada no banco (compartilhada por
+todos os workers). Quem conhece a chave consegue enumerar os códigos.
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+
+BASE62_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+CODE_BITS = 40  # 2^40 ≈ 1.1 trilhão de códigos
+CODE_LENGTH = 7  # 62^7 > 2^40
+SEQUENCE_NAME = "short_codes"
+
+
+def base62_encode(value: int, length: int = CODE_LENGTH) -> str:
+    """Codifica um inteiro em base62 com largura fixa"""
+    chars = []
+    while value:
+        value, remainder = divmod(value, 62)
+        chars.append(BASE62_ALPHABET[remainder])
+    return "".join(reversed(chars)).rjust(length, BASE62_ALPHABET[0])
+
+
+class FeistelPermutation:
+    """Permutação bijetiva com chave sobre inteiros de `bits` bits (bits par)"""
+
+    def __init__(self, key: bytes, bits: int = CODE_BITS, rounds: int = 4):
+        if bits % 2:
+            raise ValueError("bits deve ser par")
+        self.key = key
+        self.half_bits = bits // 2
+        self.mask = (1 << self.half_bits) - 1
+        self.rounds = rounds
+
+    def _round(self, index: int, value: int) -> int:
+        digest = hmac.new(self.key, f"{index}:{value}".encode(), hashlib.sha256).digest()
+        return int.from_bytes(digest[:8], "big") & self.mask
+
+    def permute(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.mask
+        for index in range(self.rounds):
+            left, right = right, left ^ self._round(index, right)
+        return (left << self.half_bits) | right
+
+
+class ShortCodeAllocator:
+    """
+    Distribui códigos a partir de blocos do contador reservados no banco
+    Uma reserva (UPDATE no contador) a cada `block_size` códigos
+    """
+
+    def __init__(self, session_factory, sequence_model, secret: Optional[str], block_size: int = 1000,
+                 secret_model=None):
+        if not secret and secret_model is None:
+            raise ValueError("Sem secret, é preciso um secret_model para gravar a chave gerada")
+        self.session_factory = session_factory
+        self.sequence_model = sequence_model
+        self.secret_model = secret_model
+        self.block_size = block_size
+        # Sem secret explícito, a chave é carregada do banco na primeira reserva
+        self.permutation: Optional[FeistelPermutation] = self._permutation(secret) if secret else None
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+        self.blocks_reserved = 0
+
+    def allocate(self) -> str:
+        """Retorna um código novo"""
+        return self.allocate_many(1)[0]
+
+    async def aallocate(self) -> str:
+        """allocate() para handlers async: a reserva de um bloco novo vai para o threadpool"""
+        with self._lock:
+            if self._next < self._end:
+                value = self._next
+                self._next += 1
+                return base62_encode(self.permutation.permute(value))
+        return await run_in_threadpool(self.allocate)
+
+    def allocate_many(self, count: int) -> List[str]:
+        """Retorna `count` códigos novos, reservando blocos quando necessário"""
+        values: List[int] = []
+        with self._lock:
+            while len(values) < count:
+                if self._next >= self._end:
+                    self._next, self._end = self._reserve(max(self.block_size, count - len(values)))
+                take = min(count - len(values), self._end - self._next)
+                values.extend(range(self._next, self._next + take))
+                self._next += take
+        return [base62_encode(self.permutation.permute(value)) for value in values]
+
+    @staticmethod
+    def _permutation(secret: str) -> FeistelPermutation:
+        return FeistelPermutation(hashlib.sha256(f"short-codes:{secret}".encode()).digest())
+
+    def _load_secret(self) -> str:
+        """Chave gravada no banco; o primeiro processo a subir gera e grava uma aleatória"""
+        model = self.secret_model
+        for attempt in range(2):
+            db = self.session_factory()
+            try:
+                row = db.query(model.value).filter(model.name == SEQUENCE_NAME).first()
+                if row is not None:
+                    return row[0]
+                secret = secrets.token_urlsafe(32)
+                db.add(model(name=SEQUENCE_NAME, value=secret))
+                db.commit()
+                print("⚠️  SHORT_CODE_SECRET não definido; usando chave aleatória gravada no banco (app_secrets)")
+                return secret
+            except IntegrityError:
+                # Outro processo gravou a chave ao mesmo tempo: ler a dele
+                db.rollback()
+                if attempt:
+                    raise
+            finally:
+                db.close()
+
+    def _reserve(self, size: int):
+        """Reserva [start, start + size) no contador compartilhado"""
+        if self.permutation is None:
+            self.permutation = self._permutation(self._load_secret())
+        model = self.sequence_model
+        for attempt in range(2):
+            db = self.session_factory()
+            try:
+                updated = db.query(model).filter(model.name == SEQUENCE_NAME).update(
+                    {model.next_value: model.next_value + size}, synchronize_session=False
+                )
+                if not updated:
+                    # Primeira reserva: criar a linha do contador
+                    db.add(model(name=SEQUENCE_NAME, next_value=size))
+                    end = size
+                else:
+                    end = db.query(model.next_value).filter(model.name == SEQUENCE_NAME).scalar()
+                db.commit()
+                break
+            except IntegrityError:
+                # Outro processo criou o contador ao mesmo tempo
+                db.rollback()
+                if attempt:
+                    raise
+            finally:
+                db.close()
+        if end > 1 << CODE_BITS:
+            raise RuntimeError("Espaço de códigos curtos esgotado")
+        self.blocks_reserved += 1
+        return end - size, end
+
+    def stats(self):
+        return {
+            "block_size": self.block_size,
+            "blocks_reserved": self.blocks_reserved,
+            "remaining_in_block": self._end - self._next,
+        }
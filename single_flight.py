@@ -0,0 +1,69 @@
+"""
+Single-flight: requisições concorrentes para a mesma chave compartilham uma consulta
+
+A primeira requisição (líder) dispara a consulta numa task; as que chegam
+enquanto ela está em andamento aguardam a mesma task e recebem o mesmo
+resultado, inclusive None (não encontrado) e exceções.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Uma execução em andamento por chave, com prazo máximo por chave"""
+
+    def __init__(self, timeout: float = 5.0):
+        self.timeout = timeout
+        self._inflight: Dict[Hashable, Tuple[asyncio.Task, float]] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Resultado de func() para a chave, executada uma vez para todos os concorrentes
+        Passado o prazo da chave, levanta asyncio.TimeoutError e libera a chave para
+        uma nova consulta; a task em andamento não é cancelada (o resultado ainda
+        pode preencher o cache).
+        """
+        flight = self._inflight.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(func())
+            flight = self._inflight[key] = (task, time.monotonic() + self.timeout)
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        task, deadline = flight
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._release(key, task)
+            raise
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        flight = self._inflight.get(key)
+        if flight is not None and flight[0] is task:
+            del self._inflight[key]
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        self._release(key, task)
+        # Exceção sempre consumida, mesmo quando todos os que aguardavam desistiram
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, object]:
+        requests = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "timeout": self.timeout,
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / requests, 4) if requests else 0.0,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
@@ -0,0 +1,101 @@
+"""
+Arquivos estáticos com hash no nome, pré-comprimidos e com cache imutável
+
+No startup cada arquivo de frontend/static vira css/style.<hash>.css em memória,
+com variantes gzip/brotli. Como o nome muda junto com o conteúdo, a resposta
+pode ser cacheada por um ano sem revalidação.
+"""
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from pages import CompressedBody, directory_signature, page_response
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def fingerprint_name(path: str, content: bytes, length: int = 12) -> str:
+    """css/style.css -> css/style.<hash>.css"""
+    digest = hashlib.sha256(content).hexdigest()[:length]
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+class StaticAsset(CompressedBody):
+    def __init__(self, path: str, content: bytes):
+        super().__init__(content)
+        self.path = path
+        # O Starlette acrescenta "; charset=utf-8" aos tipos text/*
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+class AssetManifest:
+    """Mapa caminho original -> nome com hash, com os bytes prontos para servir"""
+
+    def __init__(self, static_dir: str, url_prefix: str = "/assets", fallback_prefix: str = "/static"):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix.rstrip("/")
+        self.fallback_prefix = fallback_prefix.rstrip("/")
+        self._lock = threading.Lock()
+        self._urls: Dict[str, str] = {}
+        self._assets: Dict[str, StaticAsset] = {}
+        self._signature: Optional[Tuple] = None
+        self.builds = 0
+
+    def build(self):
+        """Lê, calcula o hash e comprime todos os arquivos do diretório estático"""
+        urls: Dict[str, str] = {}
+        assets: Dict[str, StaticAsset] = {}
+        signature = directory_signature(self.static_dir)
+        for root, _, files in os.walk(self.static_dir):
+            for name in files:
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, self.static_dir).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    content = f.read()
+                hashed = fingerprint_name(path, content)
+                urls[path] = f"{self.url_prefix}/{hashed}"
+                assets[hashed] = StaticAsset(path, content)
+        with self._lock:
+            self._urls = urls
+            self._assets = assets
+            self._signature = signature
+            self.builds += 1
+
+    def url(self, path: str) -> str:
+        """URL com hash do arquivo; sem entrada no manifesto, cai no /static normal"""
+        self._check_changes()
+        path = path.lstrip("/")
+        return self._urls.get(path) or f"{self.fallback_prefix}/{path}"
+
+    def get(self, hashed_path: str) -> Optional[StaticAsset]:
+        self._check_changes()
+        return self._assets.get(hashed_path)
+
+    def refresh(self) -> bool:
+        """Refaz o manifesto se algum arquivo mudou; roda numa thread, fora das requisições"""
+        if directory_signature(self.static_dir) == self._signature:
+            return False
+        self.build()
+        return True
+
+    def _check_changes(self):
+        # Só o primeiro uso sem build() no startup; alterações chegam por refresh()
+        if self._signature is None:
+            self.build()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "assets": len(self._assets),
+            "builds": self.builds,
+            "bytes": sum(len(asset.variants["identity"][0]) for asset in self._assets.values()),
+        }
+
+
+def asset_response(request: Request, asset: StaticAsset) -> Response:
+    return page_response(request, asset, media_type=asset.media_type, cache_control=IMMUTABLE_CACHE_CONTROL)
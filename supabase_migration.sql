@@ -33,6 +33,8 @@ CREATE TABLE IF NOT EXISTS shortened_urls (
 );
 
 -- Tabela de cliques/analytics
+-- (a API FastAPI grava seus eventos em click_events, ligada a links.id e criada
+-- por init_database; url_clicks é só do esquema Supabase, ligada a shortened_urls)
 CREATE TABLE IF NOT EXISTS url_clicks (
     id SERIAL PRIMARY KEY,
     url_id INTEGER NOT NULL REFERENCES shortened_urls(id) ON DELETE CASCADE,
@@ -36,6 +36,525 @@ def test_import():
     
     return True
 
+def test_import_time():
+    """Garante que importar main.py é barato (cold start) e não toca no banco"""
+    print("\n⏱️  Testando tempo de import...")
+
+    budget = float(os.getenv('IMPORT_TIME_BUDGET', '2.0'))
+    db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_budget_test.db')
+    code = (
+        "import sys, time; t = time.perf_counter(); import main; "
+        "print(time.perf_counter() - t); "
+        "print(','.join(m for m in ('authlib', 'httpx', 'passlib', 'uvicorn') if m in sys.modules))"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    assert result.returncode == 0, result.stderr
+    *_, elapsed, heavy = result.stdout.splitlines()
+    elapsed = float(elapsed)
+    print(f"✅ import main: {elapsed:.3f}s (limite {budget:.1f}s)")
+
+    assert elapsed < budget, f"import main levou {elapsed:.3f}s (limite {budget:.1f}s)"
+    assert not heavy, f"imports pesados carregados no import: {heavy}"
+    assert not os.path.exists(db_path), "o import não deve criar o banco/tabelas"
+    return True
+
+class _StandInRespServer:
+    """Servidor RESP mínimo (GET/MGET/SET PX/DEL) para testar o backend sem Redis"""
+
+    def __init__(self):
+        import socketserver
+        import threading
+
+        data = self.data = {}
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    args = []
+                    for _ in range(int(line[1:])):
+                        length = int(self.rfile.readline()[1:])
+                        args.append(self.rfile.read(length + 2)[:-2])
+                    self.wfile.write(self.reply(args))
+
+            def reply(self, args):
+                command, keys = args[0].upper(), args[1:]
+                now = time.monotonic()
+                live = lambda key: data[key][0] if key in data and data[key][1] > now else None
+                bulk = lambda value: b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+                if command in (b"GET", b"MGET"):
+                    values = [bulk(live(key)) for key in keys]
+                    return values[0] if command == b"GET" else b"*%d\r\n" % len(values) + b"".join(values)
+                if command == b"SET":
+                    data[keys[0]] = (keys[1], now + int(keys[3]) / 1000 if len(keys) > 3 else float("inf"))
+                    return b"+OK\r\n"
+                if command == b"DEL":
+                    return b":%d\r\n" % sum(data.pop(key, None) is not None for key in keys)
+                return b"+OK\r\n"
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def test_resp_cache_backend():
+    """Cache compartilhado via RESP: pipeline no multi-get, write-through e delete-through entre workers"""
+    print("\n🗃️  Testando backend de cache RESP...")
+    from datetime import datetime
+    from cache import LRUTTLCache, RedirectEntry, TieredCache, tuple_codec
+    from resp_cache import RespCacheBackend, RespClient
+
+    server = _StandInRespServer()
+    client = RespClient(f"redis://127.0.0.1:{server.port}/0")
+    encode, decode = tuple_codec(RedirectEntry)
+    shared = RespCacheBackend(client, "test:redirect:", 60, encode, decode, retry_after=60)
+    # Dois "workers": LRUs locais separados sobre o mesmo backend
+    worker_a = TieredCache(LRUTTLCache(ttl=5), shared)
+    worker_b = TieredCache(LRUTTLCache(ttl=5), shared)
+    try:
+        entry = RedirectEntry(1, "https://example.com", datetime(2030, 1, 1, 12, 30), True, 301, 60)
+        worker_a.set("abc", entry)
+        worker_a.set("def", entry._replace(link_id=2))
+        assert worker_b.get("abc") == entry
+
+        trips = shared.round_trips
+        values = worker_b.get_many(["abc", "def", "missing"])
+        assert [value.link_id if value else None for value in values] == [1, 2, None]
+        assert shared.round_trips == trips + 1, "get_many deve usar uma única ida ao servidor"
+        assert worker_b.get("def").link_id == 2
+        assert shared.round_trips == trips + 1, "chave já trazida pelo multi-get vem do LRU local"
+
+        worker_a.delete("def")
+        worker_b.local.clear()
+        assert worker_b.get("def") is None
+        print("✅ Multi-get em pipeline e invalidação entre workers")
+
+        # Servidor fora: miss e backend marcado como indisponível, sem exceção
+        server.stop()
+        client.close()
+        worker_b.local.clear()
+        assert worker_b.get("abc") is None
+        assert not shared.available and shared.errors == 1
+        print("✅ Falha do servidor vira miss")
+    finally:
+        server.stop()
+        client.close()
+    return True
+
+def _run_api(scenario):
+    """Executa scenario(client, headers) contra o app em processo, com lifespan e um usuário novo logado"""
+    import asyncio
+    import uuid
+    import httpx
+    import main
+
+    async def run():
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                username = f"t{uuid.uuid4().hex[:10]}"
+                response = await client.post("/api/auth/register", json={
+                    "username": username, "email": f"{username}@example.com", "password": "testpass123"
+                })
+                assert response.status_code == 200, response.text
+                response = await client.post("/api/auth/login", data={"username": username, "password": "testpass123"})
+                assert response.status_code == 200, response.text
+                headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+                return await scenario(client, headers)
+
+    return asyncio.run(run())
+
+def test_short_code_secret():
+    """Sem SHORT_CODE_SECRET: chave aleatória gravada no banco e a mesma para todos os processos"""
+    print("\n🔑 Testando chave dos códigos curtos...")
+    import tempfile
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from main import AppSecret, Base, CodeSequence
+    from short_codes import ShortCodeAllocator
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/codes.db")
+        Base.metadata.create_all(engine, tables=[AppSecret.__table__, CodeSequence.__table__])
+        Session = sessionmaker(bind=engine)
+        first = ShortCodeAllocator(Session, CodeSequence, secret="", block_size=10, secret_model=AppSecret)
+        second = ShortCodeAllocator(Session, CodeSequence, secret="", block_size=10, secret_model=AppSecret)
+        codes = first.allocate_many(3) + second.allocate_many(3)
+        assert len(set(codes)) == 6
+        with Session() as db:
+            stored = db.query(AppSecret.value).scalar()
+        assert stored and stored != "linkify-short-codes"
+        assert first.permutation.key == second.permutation.key
+        # Chave fixa no ambiente continua determinística e não toca a tabela
+        fixed = ShortCodeAllocator(Session, CodeSequence, secret="fixed", block_size=10, secret_model=AppSecret)
+        assert fixed.permutation.key != first.permutation.key
+        engine.dispose()
+    print("✅ Chave gerada uma vez e compartilhada")
+    return True
+
+def test_timeseries_bounds():
+    """Série temporal: limites com fuso (sufixo Z) viram UTC, intervalo invertido é 400"""
+    print("\n📈 Testando limites da série temporal...")
+
+    async def scenario(client, headers):
+        response = await client.post("/api/links", json={"original_url": "https://example.com"}, headers=headers)
+        assert response.status_code == 200, response.text
+        url = f"/api/links/{response.json()['id']}/timeseries"
+
+        response = await client.get(url, params={
+            "start": "2030-01-01T00:30:00Z", "end": "2030-01-01T05:10:00Z"
+        }, headers=headers)
+        assert response.status_code == 200, response.text
+        points = response.json()["points"]
+        assert [point["bucket"] for point in (points[0], points[-1])] == ["2030-01-01T00:00:00", "2030-01-01T05:00:00"]
+        assert len(points) == 6 and all(point["clicks"] == 0 for point in points)
+
+        # 01:00-03:00 (UTC) = 04:00Z-06:00Z
+        response = await client.get(url, params={
+            "granularity": "hour", "start": "2030-01-01T01:00:00-03:00", "end": "2030-01-01T06:00:00Z"
+        }, headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["points"][0]["bucket"] == "2030-01-01T04:00:00"
+
+        response = await client.get(url, params={
+            "start": "2030-01-02T00:00:00Z", "end": "2030-01-01T00:00:00Z"
+        }, headers=headers)
+        assert response.status_code == 400
+
+    _run_api(scenario)
+    print("✅ Limites com fuso normalizados para UTC")
+    return True
+
+def test_short_code_filter_across_workers():
+    """Código criado com o filtro de um worker resolve no worker cujo filtro ainda não o conhece"""
+    print("\n🌸 Testando filtro de Bloom entre workers...")
+    import main
+    from bloom import ShortCodeFilter
+
+    def make_filter():
+        return ShortCodeFilter(main.SessionLocal, main.Link, min_capacity=1000, authoritative=False)
+
+    async def scenario(client, headers):
+        other_worker = make_filter()
+        other_worker.rebuild()
+        creating_worker = main.short_code_filter
+        creating_worker.enabled = True
+        creating_worker.rebuild()
+        try:
+            response = await client.post("/api/links", json={"original_url": "https://example.com"}, headers=headers)
+            assert response.status_code == 200, response.text
+            short_code = response.json()["short_code"]
+            assert creating_worker.lookup(short_code) is True
+            assert other_worker.lookup(short_code) is None, "ausência não autoritativa"
+
+            # Redirect atendido pelo outro worker (sem cache local e sem mensagem do barramento)
+            main.short_code_filter = other_worker
+            main.redirect_cache.clear_local()
+            response = await client.get(f"/{short_code}", follow_redirects=False)
+            assert response.status_code in (301, 302), response.text
+            assert other_worker.lookup(short_code) is True and other_worker.stats()["learned"] == 1
+            assert other_worker.stats()["false_positives"] == 0
+
+            # Código inexistente: conferido no banco, 404 sem contar falso positivo
+            response = await client.get("/nao-existe-123", follow_redirects=False)
+            assert response.status_code == 404
+            assert other_worker.stats()["false_positives"] == 0
+        finally:
+            main.short_code_filter = creating_worker
+            creating_worker.enabled = main.BLOOM_FILTER_ENABLED
+
+    _run_api(scenario)
+    print("✅ Código de outro worker resolvido e aprendido pelo filtro")
+    return True
+
+def test_rollup_watermark():
+    """Rollup: a marca d'água não passa de um id faltante até a carência acabar"""
+    print("\n🧮 Testando marca d'água dos rollups...")
+    import tempfile
+    from datetime import datetime
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from main import Base, ClickEvent, LinkClicksDaily, LinkClicksHourly, RollupWatermark
+    from rollups import ClickRollup
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/rollups.db")
+        Base.metadata.create_all(engine, tables=[model.__table__ for model in (
+            ClickEvent, LinkClicksHourly, LinkClicksDaily, RollupWatermark)])
+        Session = sessionmaker(bind=engine)
+        clicked_at = datetime(2030, 1, 1, 10, 15)
+
+        def add_events(*ids):
+            with Session() as db:
+                db.add_all([ClickEvent(id=event_id, link_id=7, clicked_at=clicked_at) for event_id in ids])
+                db.commit()
+
+        def state():
+            with Session() as db:
+                watermark = db.query(RollupWatermark.last_event_id).scalar()
+                clicks = db.query(LinkClicksHourly.clicks).filter(LinkClicksHourly.link_id == 7).scalar()
+                return watermark, clicks
+
+        rollup = ClickRollup(Session, ClickEvent, LinkClicksHourly, LinkClicksDaily, RollupWatermark,
+                             gap_grace_seconds=60)
+        # Id 3 ainda "em transação": para no 2
+        add_events(1, 2, 4)
+        assert rollup.run() == 2
+        assert state() == (2, 2)
+        assert rollup.run() == 0
+
+        # Id 3 confirmado depois: entra sem perder nem duplicar o 4
+        add_events(3)
+        assert rollup.run() == 2
+        assert state() == (4, 4)
+
+        # Buraco que nunca fecha: pulado quando a carência acaba
+        add_events(6)
+        assert rollup.run() == 0
+        rollup.gap_grace = 0
+        assert rollup.run() == 1
+        assert state() == (6, 5)
+        assert rollup.stats()["gaps_skipped"] == 1 and rollup.stats()["open_gaps"] == 0
+        engine.dispose()
+    print("✅ Marca d'água segura atrás de ids faltantes")
+    return True
+
+def test_click_event_policies():
+    """Fila de eventos cheia: drop_new descarta o novo, drop_oldest o mais antigo, block espera sem travar o loop"""
+    print("\n🖱️  Testando políticas da fila de eventos de clique...")
+    import asyncio
+    import tempfile
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from main import Base, ClickEvent, Link
+    from click_events import BLOCK, DROP_NEW, DROP_OLDEST, ClickEventQueue
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/events.db")
+        Base.metadata.create_all(engine, tables=[Link.__table__, ClickEvent.__table__])
+        Session = sessionmaker(bind=engine)
+
+        def written():
+            with Session() as db:
+                link_ids = [row[0] for row in db.query(ClickEvent.link_id).order_by(ClickEvent.id)]
+                db.query(ClickEvent).delete()
+                db.commit()
+                return link_ids
+
+        for policy, accepted, kept in ((DROP_NEW, [True, True, False], [1, 2]),
+                                       (DROP_OLDEST, [True, True, True], [2, 3])):
+            events = ClickEventQueue(Session, ClickEvent, Link, max_size=2, policy=policy)
+            assert [events.publish({"link_id": link_id}) for link_id in (1, 2, 3)] == accepted
+            assert events.stats()["dropped"] == 1
+            assert events.drain() == 2
+            assert written() == kept
+
+        events = ClickEventQueue(Session, ClickEvent, Link, max_size=1, policy=BLOCK, block_timeout=0.2)
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.ensure_future(ticker())
+            assert await events.apublish({"link_id": 1})
+            # Fila cheia até o fim do prazo: descarta, e o event loop seguiu rodando
+            assert not await events.apublish({"link_id": 2})
+            assert ticks >= 10, f"event loop travado durante a espera ({ticks} ticks)"
+            # Espaço liberado durante a espera: o evento entra
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, lambda: loop.run_in_executor(None, events.drain))
+            assert await events.apublish({"link_id": 3})
+            task.cancel()
+
+        asyncio.run(scenario())
+        assert events.stats()["dropped"] == 1
+        events.drain()
+        assert written() == [1, 3]
+        engine.dispose()
+    print("✅ drop_new, drop_oldest e block")
+    return True
+
+def test_cache_invalidation():
+    """Barramento por polling: chaves publicadas por um worker chegam ao outro, agrupadas"""
+    print("\n📣 Testando invalidação entre workers...")
+    import tempfile
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from main import Base, CacheInvalidation
+    from invalidation import InvalidationBus, PollingTransport
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/invalidation.db")
+        Base.metadata.create_all(engine, tables=[CacheInvalidation.__table__])
+        Session = sessionmaker(bind=engine)
+        received = {"a": [], "b": []}
+        buses = {
+            name: InvalidationBus(PollingTransport(Session, CacheInvalidation, poll_interval=0.05),
+                                  lambda kind, keys, name=name: received[name].append((kind, sorted(keys))),
+                                  coalesce_window=0.05)
+            for name in received
+        }
+        for bus in buses.values():
+            bus.start()
+        try:
+            buses["a"].publish("redirect", ["abc"])
+            buses["a"].publish("redirect", ["def"])
+            deadline = time.monotonic() + 5
+            while not received["b"] and time.monotonic() < deadline:
+                time.sleep(0.02)
+            time.sleep(0.2)
+            assert received["b"] == [("redirect", ["abc", "def"])]
+            assert received["a"] == [], "o próprio worker não recebe o que publicou"
+            assert buses["a"].stats()["messages_sent"] == 1
+        finally:
+            for bus in buses.values():
+                bus.stop()
+            engine.dispose()
+    print("✅ Invalidação entregue ao outro worker numa só mensagem")
+    return True
+
+def test_invalidation_bus_with_workers():
+    """uvicorn --workers 2 (sem WEB_CONCURRENCY): cada worker liga o barramento no modo auto"""
+    print("\n👥 Testando barramento com uvicorn --workers...")
+    import socket
+    import tempfile
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp, socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+        probe.close()
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/workers.db", METRICS_TOKEN="test-token",
+                   DB_INIT_ON_STARTUP="false", INVALIDATION_BUS="auto")
+        env.pop("WEB_CONCURRENCY", None)
+        subprocess.run([sys.executable, "main.py", "init-db"], env=env, cwd=base_dir, check=True,
+                       capture_output=True)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--workers", "2", "--port", str(port)],
+            env=env, cwd=base_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            transports = set()
+            deadline = time.monotonic() + 30
+            # Espera os workers subirem; depois várias requisições para passar pelos dois
+            while time.monotonic() < deadline and not transports:
+                try:
+                    response = requests.get(f"http://127.0.0.1:{port}/api/metrics", timeout=2,
+                                            headers={"Authorization": "Bearer test-token"})
+                    transports.add(response.json()["cache_invalidation"]["transport"])
+                except requests.RequestException:
+                    time.sleep(0.2)
+            for _ in range(10):
+                response = requests.get(f"http://127.0.0.1:{port}/api/metrics", timeout=2,
+                                        headers={"Authorization": "Bearer test-token"})
+                transports.add(response.json()["cache_invalidation"]["transport"])
+            assert transports == {"PollingTransport"}, transports
+        finally:
+            server.terminate()
+            server.wait(10)
+
+    # Processo único, SQLite: modo auto continua desligado
+    code = "import main; print(main.invalidation_bus.enabled)"
+    env = dict(os.environ, INVALIDATION_BUS="auto")
+    env.pop("WEB_CONCURRENCY", None)
+    result = subprocess.run([sys.executable, "-c", code], env=env, cwd=base_dir, capture_output=True, text=True)
+    assert result.stdout.split()[-1] == "False", result.stdout + result.stderr
+    print("✅ Barramento ligado nos workers do uvicorn e desligado num processo só")
+    return True
+
+def test_single_flight():
+    """Misses concorrentes da mesma chave compartilham uma consulta; prazo libera a chave"""
+    print("\n🛫 Testando single-flight...")
+    import asyncio
+    from single_flight import SingleFlight
+
+    async def scenario():
+        flights = SingleFlight(timeout=1.0)
+        calls = []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "https://example.com"
+
+        results = await asyncio.gather(*(flights.do("abc", lookup) for _ in range(10)))
+        assert results == ["https://example.com"] * 10
+        assert len(calls) == 1
+        stats = flights.stats()
+        assert (stats["leaders"], stats["coalesced"], stats["in_flight"]) == (1, 9, 0)
+
+        # Consulta lenta: os que esperam recebem TimeoutError e a chave fica livre
+        slow = SingleFlight(timeout=0.05)
+        try:
+            await slow.do("abc", lambda: asyncio.sleep(1))
+            assert False, "deveria estourar o prazo"
+        except asyncio.TimeoutError:
+            pass
+        assert slow.stats()["timeouts"] == 1 and slow.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+    print("✅ Uma consulta para 10 requisições concorrentes")
+    return True
+
+def test_template_reload():
+    """Template ou estático alterado: refresh() refaz fora da requisição; get()/url() nunca varrem o disco"""
+    print("\n📄 Testando recarga de templates...")
+    import tempfile
+    from pages import PageCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.html")
+        with open(path, "w") as f:
+            f.write("v1")
+        pages = PageCache(lambda name: open(os.path.join(tmp, name)).read(), template_dir=tmp)
+        pages.warm(["index.html"])
+        assert not pages.refresh(), "nada mudou"
+
+        with open(path, "w") as f:
+            f.write("v2")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        assert pages.get("index.html").variants["identity"][0] == b"v1", "get() não deve varrer o disco"
+        assert pages.refresh()
+        renders = pages.renders
+        assert pages.get("index.html").variants["identity"][0] == b"v2"
+        assert pages.renders == renders, "página já re-renderizada pela thread"
+        assert pages.stats()["reloads"] == 1
+
+        # Estáticos com hash: mesmo esquema, o nome novo só aparece depois do refresh()
+        from static_assets import AssetManifest
+        static_dir = os.path.join(tmp, "static")
+        os.makedirs(static_dir)
+        css = os.path.join(static_dir, "style.css")
+        with open(css, "w") as f:
+            f.write("a{}")
+        assets = AssetManifest(static_dir)
+        assets.build()
+        old_url = assets.url("style.css")
+        with open(css, "w") as f:
+            f.write("b{}")
+        os.utime(css, ns=(time.time_ns(), time.time_ns() + 10**9))
+        assert assets.url("style.css") == old_url, "url() não deve varrer o disco"
+        assert assets.refresh() and assets.url("style.css") != old_url
+        assert not assets.refresh()
+    print("✅ Recarga em background, sem varredura nas requisições")
+    return True
+
 def test_database():
     """Testa se o banco de dados está funcionando"""
     print("\n🗄️  Testando banco de dados...")
@@ -102,6 +621,17 @@ def main():
     
     tests = [
         ("Imports", test_import),
+        ("Tempo de import", test_import_time),
+        ("Cache RESP", test_resp_cache_backend),
+        ("Chave códigos", test_short_code_secret),
+        ("Série temporal", test_timeseries_bounds),
+        ("Bloom workers", test_short_code_filter_across_workers),
+        ("Rollups", test_rollup_watermark),
+        ("Fila de cliques", test_click_event_policies),
+        ("Invalidação", test_cache_invalidation),
+        ("Workers", test_invalidation_bus_with_workers),
+        ("Single-flight", test_single_flight),
+        ("Templates", test_template_reload),
         ("Banco de Dados", test_database), 
         ("FastAPI", test_fastapi),
         ("Servidor", test_server)